@@ -4,28 +4,70 @@ from flask_jwt_extended import JWTManager
 from flask_pymongo import PyMongo
 from flask_cors import CORS
 from .config import Config
-
-logging.basicConfig(level=logging.INFO)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-logging.getLogger().addHandler(console_handler)
+from .cache import TaskCache
+from .metrics import Metrics
+from .logging_config import configure_logging, init_request_logging, restart_logging
+from .aio import AsyncMongo
+from .passwords import PasswordHasher
+from .health import ReadinessCheck
 
 mongo = PyMongo()
+async_mongo = AsyncMongo()  # used by the async app only (app.asgi)
 jwt = JWTManager()
+task_cache = TaskCache()
+metrics = Metrics()
+passwords = PasswordHasher()
+readiness = ReadinessCheck()
+
+def mongo_client_options(config):
+    """MongoClient (and Motor) keyword arguments from the MONGO_* settings."""
+    options = {
+        "maxPoolSize": config["MONGO_MAX_POOL_SIZE"],
+        "minPoolSize": config["MONGO_MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MONGO_MAX_IDLE_TIME_MS"] or None,
+        "connectTimeoutMS": config["MONGO_CONNECT_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        "socketTimeoutMS": config["MONGO_SOCKET_TIMEOUT_MS"] or None,
+        "event_listeners": metrics.mongo_listeners(),
+    }
+    if config["MONGO_COMPRESSORS"]:
+        options["compressors"] = config["MONGO_COMPRESSORS"]
+    return options
+
+def init_after_fork(app):
+    """Replace what a forked worker can't share with the gunicorn master it
+    was preloaded in: the log writer thread and, for the Flask app, the
+    MongoClient (the async app only connects in its lifespan, after fork)."""
+    restart_logging(app)
+    if isinstance(app, Flask):
+        mongo.init_app(app, **mongo_client_options(app.config))
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-    
-    CORS(app)
-    mongo.init_app(app)
+    configure_logging(app)
+
+    CORS(app, expose_headers=["X-Next-Cursor", "ETag"])
+    # Nothing here talks to MongoDB: the client connects on first use, and
+    # indexes are created by "flask --app app.main create-indexes".
+    mongo.init_app(app, **mongo_client_options(app.config))
+    metrics.init_app(app)
+    init_request_logging(app)
     jwt.init_app(app)
+    task_cache.init_app(app)
+    passwords.init_app(app)
+    readiness.init_app(app)
+
+    from .commands import create_indexes
+    app.cli.add_command(create_indexes)
 
     from .routes.auth import auth_bp
+    from .routes.health import health_bp
     from .routes.tasks import tasks_bp
     app.register_blueprint(auth_bp)
+    app.register_blueprint(health_bp)
     app.register_blueprint(tasks_bp)
 
     logging.info("Flask application has been initialized!")
-    
+
     return app
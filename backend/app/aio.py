@@ -0,0 +1,109 @@
+import re
+
+import flask_jwt_extended
+import jwt
+from flask import Flask
+from flask_jwt_extended.config import config as jwt_config
+from motor import motor_asyncio
+
+# Pieces the ASGI app (app.asgi) needs in place of Flask extensions: a Motor
+# client standing in for flask_pymongo, and access tokens issued and checked
+# by flask_jwt_extended's rules, so a client can log in against either app
+# and use the token on both.
+
+
+class AsyncMongo:
+    """Motor counterpart of flask_pymongo.PyMongo, with the same cx/db
+    attributes. The client is created on startup, inside the event loop
+    that will use it."""
+
+    def __init__(self):
+        self.cx = None
+        self.db = None
+
+    def connect(self, uri, **kwargs):
+        self.cx = motor_asyncio.AsyncIOMotorClient(uri, **kwargs)
+        self.db = self.cx.get_default_database()
+
+    def close(self):
+        if self.cx is not None:
+            self.cx.close()
+        self.cx = self.db = None
+
+
+class TokenError(Exception):
+    def __init__(self, message, status=422):
+        super().__init__(message)
+        self.status = status
+
+
+class Tokens:
+    """flask_jwt_extended for the async app.
+
+    A bare Flask app carries the same config and a JWTManager, so every
+    JWT_* setting is read and normalised by the extension itself (an int
+    JWT_ACCESS_TOKEN_EXPIRES, decode algorithms, leeway, audience, issuer,
+    header name and type). Tokens are issued by the extension; checking one
+    decodes it with the settings captured here, instead of pushing an app
+    context on every request. Only the headers token location is supported.
+    """
+
+    def __init__(self, config):
+        self._app = Flask(__name__)
+        self._app.config.update(config)
+        flask_jwt_extended.JWTManager(self._app)
+        with self._app.app_context():
+            self.header_name = jwt_config.header_name
+            self.header_type = jwt_config.header_type
+            self.error_key = jwt_config.error_msg_key
+            self._identity_claim = jwt_config.identity_claim_key
+            self._decode_args = {
+                "key": jwt_config.decode_key,
+                "algorithms": jwt_config.decode_algorithms,
+                "audience": jwt_config.decode_audience,
+                "issuer": jwt_config.decode_issuer,
+                "leeway": jwt_config.leeway,
+                "options": {"verify_aud": jwt_config.decode_audience is not None},
+            }
+
+    def create_access_token(self, identity):
+        with self._app.app_context():
+            return flask_jwt_extended.create_access_token(identity=identity)
+
+    def _token(self, value):
+        # Header parsing as in flask_jwt_extended.view_decorators.
+        name, kind = self.header_name, self.header_type
+        value = (value or "").strip().strip(",")
+        if not value:
+            raise TokenError(f"Missing {name} Header", 401)
+        if not kind:
+            parts = value.split()
+            if len(parts) != 1:
+                raise TokenError(f"Bad {name} header. Expected '{name}: <JWT>'")
+            return parts[0]
+        fields = [field for field in re.split(r",\s*", value) if field.split()[:1] == [kind]]
+        if len(fields) != 1:
+            raise TokenError(f"Missing '{kind}' type in '{name}' header. Expected '{name}: {kind} <JWT>'", 401)
+        parts = fields[0].split()
+        if len(parts) != 2:
+            raise TokenError(f"Bad {name} header. Expected '{name}: {kind} <JWT>'")
+        return parts[1]
+
+    def decode_identity(self, headers):
+        """Return the identity of the access token in `headers`.
+
+        Raises TokenError with the message and status flask_jwt_extended
+        would have answered with.
+        """
+        token = self._token(headers.get(self.header_name))
+        try:
+            claims = jwt.decode(token, **self._decode_args)
+        except jwt.ExpiredSignatureError:
+            raise TokenError("Token has expired", 401)
+        except jwt.InvalidTokenError as e:
+            raise TokenError(str(e))
+        if self._identity_claim not in claims:
+            raise TokenError(f"Missing claim: {self._identity_claim}")
+        if claims.get("type", "access") != "access":
+            raise TokenError("Only non-refresh tokens are allowed")
+        return claims[self._identity_claim]
@@ -0,0 +1,93 @@
+import functools
+import logging
+from contextlib import asynccontextmanager
+from flask import Config as FlaskConfig
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from . import async_mongo, task_cache, metrics, passwords, readiness, mongo_client_options
+from .aio import TokenError, Tokens
+from .config import Config
+from .logging_config import configure_logging
+from .passwords import PasswordHasherBusy
+
+# Async serving mode: the auth and tasks routes on Starlette, backed by
+# Motor, so one process overlaps many requests' MongoDB round trips instead
+# of holding a worker per request. Run it with
+#
+#   gunicorn -k uvicorn.workers.UvicornWorker 'app.asgi:create_async_app()'
+#
+# Requests are validated and serialized by the same code as the Flask app
+# (app.validation, app.serializers, app.pagination), and the models build
+# the same queries (AsyncUser/AsyncTask in app.models). MongoDB indexes are
+# created by "flask --app app.main create-indexes".
+
+
+class AsyncApp(Starlette):
+    """Starlette app with a Flask-style config, so the shared extensions
+    (task_cache, logging) initialise from it unchanged."""
+
+    def __init__(self, config, **kwargs):
+        super().__init__(**kwargs)
+        self.config = config
+        self.tokens = Tokens(config)
+
+
+def jwt_required(view):
+    """Async stand-in for flask_jwt_extended's jwt_required(): sets
+    request.state.user_id or answers with the same errors it would."""
+    @functools.wraps(view)
+    async def wrapper(request):
+        tokens = request.app.tokens
+        try:
+            request.state.user_id = tokens.decode_identity(request.headers)
+        except TokenError as e:
+            return JSONResponse({tokens.error_key: str(e)}, status_code=e.status)
+        return await view(request)
+    return wrapper
+
+
+async def get_json(request):
+    """The decoded JSON body, or None when it is missing or malformed."""
+    try:
+        return await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def export_metrics(request):
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+
+def create_async_app():
+    config = FlaskConfig(".")
+    config.from_object(Config)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async_mongo.connect(config["MONGO_URI"], **mongo_client_options(config))
+        logging.info("Async application has been initialized!")
+        yield
+        async_mongo.close()
+
+    from .routes.async_auth import routes as auth_routes, hasher_busy
+    from .routes.async_health import routes as health_routes
+    from .routes.async_tasks import routes as task_routes
+
+    app = AsyncApp(
+        config,
+        routes=[*auth_routes, *health_routes, *task_routes, Route("/metrics", export_metrics)],
+        middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"],
+                               allow_headers=["*"], expose_headers=["X-Next-Cursor", "ETag"])],
+        exception_handlers={PasswordHasherBusy: hasher_busy},
+        lifespan=lifespan,
+    )
+    configure_logging(app)
+    task_cache.init_app(app)
+    passwords.init_app(app)
+    readiness.init_app(app)
+    return app
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import TASK_CACHE_EVENTS
+
+# redis is optional: only needed when TASK_CACHE_BACKEND = "redis", which
+# shares one cache (and its invalidations) between gunicorn workers.
+try:
+    import redis
+except ImportError:  # pragma: no cover - depends on the environment
+    redis = None
+
+
+class LocalBackend:
+    """In-process LRU bounded by entry count and total bytes, with a TTL on
+    every entry.
+
+    Generation counters live outside the LRU so evicting entries can never
+    roll a user's generation back and resurrect stale data.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= len(value)
+                TASK_CACHE_EVENTS.labels("expiration").inc()
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                TASK_CACHE_EVENTS.labels("eviction").inc()
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    def __init__(self, url, ttl=60):
+        if redis is None:
+            raise RuntimeError("TASK_CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value):
+        self.client.set(key, value, ex=self.ttl)
+
+    def generation(self, namespace):
+        return int(self.client.get(f"gen:{namespace}") or 0)
+
+    def bump(self, namespace):
+        self.client.incr(f"gen:{namespace}")
+
+
+class TaskCache:
+    """Per-user cache of serialized task list responses.
+
+    Keys embed a per-user generation, so invalidating a user is a single
+    counter bump that orphans every cached variant of their lists at once.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.max_entry_bytes = 1024 * 1024
+
+    def init_app(self, app):
+        kind = app.config["TASK_CACHE_BACKEND"]
+        ttl = app.config["TASK_CACHE_TTL_SECONDS"]
+        self.max_entry_bytes = app.config["TASK_CACHE_MAX_ENTRY_BYTES"]
+        if kind == "redis":
+            self.backend = RedisBackend(app.config["TASK_CACHE_REDIS_URL"], ttl)
+        elif kind == "local":
+            self.backend = LocalBackend(app.config["TASK_CACHE_MAX_ENTRIES"], ttl,
+                                        app.config["TASK_CACHE_MAX_BYTES"])
+        else:
+            self.backend = None
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def key(self, user_id, variant):
+        """Cache key for one list variant, fixed at the start of a request.
+
+        Reusing the same key for get and set means a response computed while
+        a write bumps the generation is stored under the old generation,
+        where nobody will read it again.
+        """
+        if self.backend is None:
+            return None
+        return f"tasks:{user_id}:{self.backend.generation(user_id)}:{variant}"
+
+    def get(self, key):
+        """Return (body, etag, next_cursor) for a cached response, or None."""
+        if key is None:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            TASK_CACHE_EVENTS.labels("miss").inc()
+            return None
+        TASK_CACHE_EVENTS.labels("hit").inc()
+        header, _, body = value.partition(b"\n")
+        etag, next_cursor = json.loads(header)
+        return body, etag, next_cursor
+
+    def set(self, key, body, etag, next_cursor=None):
+        # One bytes value per entry, so both backends store the same thing.
+        if key is None:
+            return
+        if len(body) > self.max_entry_bytes:
+            # Big pages are cheap to rebuild relative to the room they take.
+            TASK_CACHE_EVENTS.labels("oversize").inc()
+            return
+        header = json.dumps([etag, next_cursor]).encode()
+        self.backend.set(key, header + b"\n" + body)
+
+    def invalidate(self, *user_ids):
+        if self.backend is None:
+            return
+        for user_id in set(user_ids):
+            self.backend.bump(user_id)
+            TASK_CACHE_EVENTS.labels("invalidation").inc()
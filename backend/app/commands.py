@@ -0,0 +1,19 @@
+import click
+from flask.cli import with_appcontext
+
+from .models import Task, User
+
+# One-off commands, run with "flask --app app.main <command>".
+
+
+@click.command("create-indexes")
+@with_appcontext
+def create_indexes():
+    """Create (or update) the MongoDB indexes the app relies on, and bring
+    legacy tasks (shared_with strings, unscheduled reminders) up to date."""
+    Task.ensure_indexes()
+    User.ensure_indexes()
+    click.echo("MongoDB indexes are up to date.")
+    click.echo(f"Converted shared_with to a list on {Task.normalize_sharing()} task(s).")
+    scheduled, unparseable = Task.schedule_legacy_reminders()
+    click.echo(f"Scheduled {scheduled} legacy reminder(s); {unparseable} could not be parsed.")
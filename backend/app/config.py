@@ -7,3 +7,97 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     MONGO_URI = os.getenv('MONGO_URI')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+    # MongoClient options. The client connects lazily, on the first query,
+    # so nothing here is touched at import time. Timeouts are short so a
+    # missing database fails requests (and /readyz) quickly instead of
+    # holding workers. MAX_IDLE_TIME_MS closes pooled connections nobody has
+    # used for a while; 0 keeps them. MONGO_COMPRESSORS is a wire compression
+    # list such as "zstd,snappy,zlib" (zstd and snappy need their Python
+    # packages); empty sends uncompressed.
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0))
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')
+
+    # /readyz pings MongoDB at most once per READINESS_CACHE_SECONDS per
+    # worker, answering from the last result in between, and gives up on a
+    # ping after READINESS_TIMEOUT_SECONDS (keep it under the probe timeout).
+    READINESS_CACHE_SECONDS = float(os.getenv('READINESS_CACHE_SECONDS', 5))
+    READINESS_TIMEOUT_SECONDS = float(os.getenv('READINESS_TIMEOUT_SECONDS', 1))
+
+    # GET /tasks page size (default and upper bound for ?limit=)
+    TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', 100))
+    TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', 500))
+
+    # Upper bound on operations accepted by one POST /tasks/bulk request
+    BULK_MAX_OPERATIONS = int(os.getenv('BULK_MAX_OPERATIONS', 500))
+
+    # GET /tasks/export and POST /tasks/import: tasks per cursor batch and
+    # per insert_many, and how many per-line errors an import reports back
+    # (all failures are still counted).
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 100))
+
+    # GET /tasks/changes: page size, how long delete tombstones are kept
+    # (clients whose cursor is older must do a full resync) and how far behind
+    # "now" the cursor is held so slow in-flight writes aren't skipped.
+    SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', 500))
+    TOMBSTONE_TTL_SECONDS = int(os.getenv('TOMBSTONE_TTL_SECONDS', 30 * 24 * 3600))
+    SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', 5))
+
+    # Reminder worker (python -m app.reminder_worker). REMINDER_SINK is "log"
+    # or "webhook"; reminders due within the horizon are leased and held in
+    # memory until they fire.
+    REMINDER_SINK = os.getenv('REMINDER_SINK', 'log')
+    REMINDER_WEBHOOK_URL = os.getenv('REMINDER_WEBHOOK_URL')
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 500))
+    REMINDER_HORIZON_SECONDS = int(os.getenv('REMINDER_HORIZON_SECONDS', 60))
+    REMINDER_LEASE_SECONDS = int(os.getenv('REMINDER_LEASE_SECONDS', 300))
+    REMINDER_POLL_SECONDS = int(os.getenv('REMINDER_POLL_SECONDS', 10))
+    REMINDER_RETRY_SECONDS = int(os.getenv('REMINDER_RETRY_SECONDS', 60))
+
+    # Per-user cache of GET /tasks responses: "none", "redis" (shared by
+    # every worker, replica and the reminder worker) or "local" (in-process
+    # LRU). A write only invalidates the cache of the process that handled
+    # it, so "local" is only correct when a single process serves the API
+    # and nothing else writes tasks: with more, other processes serve stale
+    # lists and wrong 304s until TASK_CACHE_TTL_SECONDS runs out.
+    TASK_CACHE_BACKEND = os.getenv('TASK_CACHE_BACKEND', 'none')
+    TASK_CACHE_TTL_SECONDS = int(os.getenv('TASK_CACHE_TTL_SECONDS', 60))
+    # "local" evicts least recently used entries past either bound. Bodies
+    # over TASK_CACHE_MAX_ENTRY_BYTES aren't cached by any backend.
+    TASK_CACHE_MAX_ENTRIES = int(os.getenv('TASK_CACHE_MAX_ENTRIES', 10000))
+    TASK_CACHE_MAX_BYTES = int(os.getenv('TASK_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    TASK_CACHE_MAX_ENTRY_BYTES = int(os.getenv('TASK_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+    TASK_CACHE_REDIS_URL = os.getenv('TASK_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Request/Mongo instrumentation exported on /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Logging: records go through a bounded in-memory queue to one writer
+    # thread. LOG_FORMAT is "json" or "text"; LOG_SAMPLE_RATES keeps a
+    # fraction of INFO lines per endpoint, e.g. "tasks.get_tasks=0.1".
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
+    LOG_MAX_MESSAGE_CHARS = int(os.getenv('LOG_MAX_MESSAGE_CHARS', 2000))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_REQUESTS = os.getenv('LOG_REQUESTS', 'true').lower() == 'true'
+
+    # Password hashing. PASSWORD_HASH_METHOD is any werkzeug method, short
+    # ("scrypt") or in full ("pbkdf2:sha256:600000"); stored hashes made with
+    # other parameters are rehashed on the next successful login. Hashing
+    # runs on PASSWORD_HASH_WORKERS processes per app worker (0 = inline);
+    # past PASSWORD_HASH_MAX_PENDING queued hashes per app worker, /signup
+    # and /login answer 503 with Retry-After. The limit only bites where a
+    # worker serves requests concurrently (gthread threads, see
+    # gunicorn.conf.py, or the async app), so keep it below GUNICORN_THREADS.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 4))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 1))
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+# Readiness for /readyz: whether this worker can reach MongoDB. Probes arrive
+# every few seconds from every kubelet and load balancer, so a ping result
+# is reused for READINESS_CACHE_SECONDS rather than sent to the database
+# each time.
+
+
+class ReadinessCheck:
+    def __init__(self):
+        self.ttl = 5.0
+        self.timeout = 1.0
+        self._checked_at = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config["READINESS_CACHE_SECONDS"]
+        self.timeout = app.config["READINESS_TIMEOUT_SECONDS"]
+        self._checked_at = None
+
+    def _fresh(self):
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+
+    def _record(self, error):
+        if error is not None:
+            logging.warning("Readiness check failed: %s", error)
+        self._ready = error is None
+        self._checked_at = time.monotonic()
+        return self._ready
+
+    def check(self, ping):
+        """True when `ping()` succeeded within the last ttl seconds. Only
+        one thread pings at a time; the others wait for its answer."""
+        with self._lock:
+            if self._fresh():
+                return self._ready
+            try:
+                with pymongo.timeout(self.timeout):
+                    ping()
+            except PyMongoError as e:
+                return self._record(e)
+            return self._record(None)
+
+    async def check_async(self, ping):
+        """check() for the async app, where `ping` is a coroutine function."""
+        if self._fresh():
+            return self._ready
+        try:
+            # Motor runs the ping on a thread, out of pymongo.timeout's reach.
+            await asyncio.wait_for(ping(), self.timeout)
+        except PyMongoError as e:
+            return self._record(e)
+        except asyncio.TimeoutError:
+            return self._record(f"no answer within {self.timeout}s")
+        return self._record(None)
@@ -0,0 +1,166 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from flask import has_request_context, request
+
+# Request threads only put records on a queue; a single listener thread
+# formats them and does the (blocking) write to stdout. Messages are
+# interpolated lazily (%-style args), capped in length, and INFO-level
+# records can be sampled per route.
+
+SAMPLED_KEY = "planit.log_sampled"
+START_KEY = "planit.log_start"
+EXTRA_FIELDS = ("endpoint", "method", "path", "status", "duration_ms", "user_id")
+
+_listener = None
+
+
+def parse_sample_rates(value):
+    """"tasks.get_tasks=0.1,auth.login=0.5" -> {"tasks.get_tasks": 0.1, ...}"""
+    rates = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            endpoint, rate = item.split("=", 1)
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RouteSampler(logging.Filter):
+    """Keep a fraction of INFO-and-below records for configured endpoints.
+
+    The decision is made once per request, so a sampled request keeps all of
+    its lines. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates or not has_request_context():
+            return True
+        environ = request.environ
+        sampled = environ.get(SAMPLED_KEY)
+        if sampled is None:
+            rate = self.rates.get(request.endpoint, 1.0)
+            sampled = environ[SAMPLED_KEY] = rate >= 1.0 or random.random() < rate
+        return sampled
+
+
+class CappedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that interpolates and caps the message, leaves the rest of
+    the formatting to the listener thread, and drops records rather than
+    block when the queue is full."""
+
+    def __init__(self, log_queue, max_chars):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Args can be mutable objects; bake the message in before handing the
+        # record to another thread.
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... [{len(message) - self.max_chars} chars truncated]"
+        record.msg = message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(app, stream=None):
+    """Route all logging through one queue-backed handler. Replaces any
+    handlers already on the root logger, so nothing is written twice."""
+    global _listener
+    config = app.config
+
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if config["LOG_FORMAT"] == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.Queue(maxsize=config["LOG_QUEUE_SIZE"])
+    handler = CappedQueueHandler(log_queue, config["LOG_MAX_MESSAGE_CHARS"])
+    handler.addFilter(RouteSampler(parse_sample_rates(config["LOG_SAMPLE_RATES"])))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(config["LOG_LEVEL"])
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    return handler
+
+
+def restart_logging(app):
+    """configure_logging() for a process forked after it ran: the listener
+    thread did not survive the fork, and the old queue's lock may have been
+    held when it happened, so neither is touched."""
+    global _listener
+    _listener = None
+    configure_logging(app)
+
+
+def _stop_listener():
+    # Flush whatever is still queued on interpreter exit.
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def init_request_logging(app):
+    """One access-log line per request, at INFO so it can be sampled."""
+    if not app.config["LOG_REQUESTS"]:
+        return
+    logger = logging.getLogger("app.access")
+
+    @app.before_request
+    def _start_timer():
+        request.environ[START_KEY] = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        started = request.environ.get(START_KEY)
+        if started is not None and logger.isEnabledFor(logging.INFO):
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(
+                "%s %s %s %.2fms", request.method, request.path, response.status_code, duration_ms,
+                extra={"endpoint": request.endpoint, "method": request.method, "path": request.path,
+                       "status": response.status_code, "duration_ms": duration_ms},
+            )
+        return response
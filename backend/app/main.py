@@ -1,21 +1,11 @@
 import logging
-from app import create_app, mongo
-
-logging.basicConfig(level=logging.INFO)
-logging.info("Starting the Flask application...")
+from app import create_app
 
+# Creating the app doesn't contact MongoDB, so importing this module (once
+# per gunicorn worker, or once in the master with preload) is fast even when
+# the database is slow or down. /readyz reports whether it is reachable.
 app = create_app()
 
-# Move the connection check into an app context
-# It's best practice to run this check after the app has been initialized
-# to ensure all configurations, including the MongoDB URI, are loaded.
-with app.app_context():
-    try:
-        mongo.db.list_collection_names()
-        logging.info("Connected to MongoDB successfully!")
-    except Exception as e:
-        logging.error(f"Failed to connect to MongoDB: {e}")
-
 if __name__ == "__main__":
     logging.info("Running Flask app in debug mode...")
     app.run(debug=True)
@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from flask import Response, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+# every worker write its samples to shared files, and /metrics merges them,
+# so a scrape sees the whole pod whichever worker answers it.
+
+STATE_KEY = "planit.metrics"
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "planit_http_request_duration_seconds", "Request latency by endpoint",
+    ["method", "endpoint"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_MONGO_TIME = Histogram(
+    "planit_http_request_mongo_seconds", "Time spent in MongoDB commands per request",
+    ["method", "endpoint"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "planit_http_requests_total", "Requests by endpoint and status",
+    ["method", "endpoint", "status"],
+)
+IN_FLIGHT = Gauge(
+    "planit_http_requests_in_flight", "Requests currently being served",
+    multiprocess_mode="livesum",
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "planit_mongo_command_duration_seconds", "MongoDB command latency",
+    ["collection", "command"], buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "planit_mongo_command_failures_total", "Failed MongoDB commands",
+    ["collection", "command"],
+)
+MONGO_POOL_WAIT = Histogram(
+    "planit_mongo_pool_checkout_wait_seconds", "Time waiting to check a connection out of the pool",
+    buckets=LATENCY_BUCKETS,
+)
+TASK_CACHE_EVENTS = Counter(
+    "planit_task_cache_events_total",
+    "Task list cache hits, misses, invalidations, local evictions and expirations, and oversized "
+    "responses left uncached",
+    ["event"],
+)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Times every command per collection, and adds it to the current
+    request's Mongo total. pymongo publishes these events on the thread that
+    issued the command, so flask.request is the right request."""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event):
+        collection = self._collections.pop(event.request_id, "")
+        seconds = event.duration_micros / 1e6
+        if has_request_context():
+            state = request.environ.get(STATE_KEY)
+            if state is not None:
+                state[1] += seconds
+        return collection, seconds
+
+    def succeeded(self, event):
+        collection, seconds = self._finish(event)
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(seconds)
+
+    def failed(self, event):
+        collection, seconds = self._finish(event)
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(seconds)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolWaitTimer(monitoring.ConnectionPoolListener):
+    # Checkout start and result are published on the requesting thread.
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _observe(self):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_WAIT.observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_checked_out(self, event):
+        self._observe()
+
+    def connection_check_out_failed(self, event):
+        self._observe()
+
+    # The remaining pool events aren't needed.
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = True
+        # Labelled children are looked up once per route/status and reused;
+        # .labels() on every request costs more than the observation itself.
+        self._route_children = {}
+        self._status_children = {}
+
+    def mongo_listeners(self):
+        return [CommandTimer(), PoolWaitTimer()]
+
+    def init_app(self, app):
+        self.enabled = app.config["METRICS_ENABLED"]
+        app.add_url_rule("/metrics", "metrics", self.export)
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        # [start, seconds spent in Mongo, already recorded]. Kept in the WSGI
+        # environ rather than flask.g, which is several times slower to reach.
+        request.environ[STATE_KEY] = [time.perf_counter(), 0.0, False]
+        IN_FLIGHT.inc()
+
+    def _record(self, req, state, status):
+        elapsed = time.perf_counter() - state[0]
+        state[2] = True
+        # The route pattern, not the raw path, keeps label cardinality bounded.
+        key = (req.method, req.url_rule.rule if req.url_rule else "unmatched")
+
+        children = self._route_children.get(key)
+        if children is None:
+            children = (REQUEST_LATENCY.labels(*key), REQUEST_MONGO_TIME.labels(*key))
+            self._route_children[key] = children
+        children[0].observe(elapsed)
+        children[1].observe(state[1])
+
+        key += (status,)
+        counter = self._status_children.get(key)
+        if counter is None:
+            counter = self._status_children[key] = REQUESTS.labels(key[0], key[1], str(status))
+        counter.inc()
+
+    def _after_request(self, response):
+        req = request._get_current_object()
+        state = req.environ.get(STATE_KEY)
+        if state is not None:
+            self._record(req, state, response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        req = request._get_current_object()
+        state = req.environ.get(STATE_KEY)
+        if state is None:
+            return
+        IN_FLIGHT.dec()
+        # after_request doesn't run for unhandled exceptions.
+        if not state[2]:
+            self._record(req, state, 500)
+
+    def render(self):
+        """(body, content type) of the current samples in text format."""
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    def export(self):
+        body, content_type = self.render()
+        return Response(body, mimetype=content_type)
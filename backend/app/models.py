@@ -1,12 +1,420 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
-from . import mongo
+import asyncio
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import ASCENDING, ReturnDocument, InsertOne, UpdateOne, DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from . import mongo, async_mongo, task_cache, passwords
+from .pagination import SORT_KEYS, keyset_condition
+from .serializers import to_jsonable
+from .reminders import reminder_fields, ensure_indexes as ensure_reminder_indexes
+from .passwords import PasswordHasherBusy
 from bson.objectid import ObjectId  # Use this to handle MongoDB ObjectIds
 
+# Fields a client may ask for with ?fields=. _id is always returned.
+TASK_FIELDS = (
+    "title", "description", "due_date", "status", "priority", "user_id",
+    "reminder", "shared_with", "created_at", "updated_at",
+)
+
+# Fields written by GET /tasks/export, in CSV column order.
+EXPORT_FIELDS = (
+    "_id", "title", "description", "due_date", "status", "priority",
+    "reminder", "shared_with", "created_at", "updated_at",
+)
+_EXPORT_SORT = [("due_date", ASCENDING), ("_id", ASCENDING)]
+
+# Reminder worker bookkeeping that never leaves the API.
+HIDDEN_FIELDS = ("reminder_claim", "reminder_lease_until")
+
+
+# Projections are built per call: mongomock edits the projection document it
+# is given, so a shared module-level dict breaks concurrent requests.
+def _hidden_projection():
+    return {field: 0 for field in HIDDEN_FIELDS}
+
+
+def _export_projection():
+    return {field: 1 for field in EXPORT_FIELDS}
+
+
+def _new_task_document(user_id, title, description, due_date, reminder=None,
+                       shared_with=None, status="Pending", priority="Medium"):
+    now = datetime.utcnow()
+    task_data = {
+        "title": title,
+        "description": description,
+        "due_date": due_date,
+        "status": status,
+        "priority": priority,
+        "user_id": user_id,
+        "reminder": reminder,  # New field for reminders
+        "shared_with": shared_with or [],
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }
+    if reminder is not None:
+        task_data.update(reminder_fields(reminder))
+    return task_data
+
+
+def _owned_query(task_id, user_id, expected_version=None):
+    """Filter matching a task only if `user_id` owns it (and, optionally, only
+    at `expected_version`). Returns None for ids that can't match anything."""
+    if not ObjectId.is_valid(task_id):
+        return None
+    query = {"_id": ObjectId(task_id), "user_id": user_id}
+    if expected_version is not None:
+        # Tasks written before versioning have no field; treat them as 0.
+        query["version"] = expected_version or None
+    return query
+
+
+def _owned_update(update):
+    # Every write to a task bumps its version and updated_at.
+    update.setdefault("$set", {})["updated_at"] = datetime.utcnow()
+    update["$inc"] = {"version": 1}
+    return update
+
+
+def _shared_users(task):
+    # Older documents may hold the form's comma-separated string of user ids.
+    users = (task or {}).get("shared_with") or []
+    if isinstance(users, str):
+        return list(dict.fromkeys(user.strip() for user in users.split(",") if user.strip()))
+    return list(users)
+
+
+def _legacy_sharing(query):
+    # shared_with written before it was parsed: a string, or null. $addToSet
+    # and $pullAll fail on those, and {"shared_with": user} never matches.
+    return dict(query, shared_with={"$exists": True, "$not": {"$type": "array"}})
+
+
+def _is_legacy_sharing_error(error):
+    # "Cannot apply $addToSet to non-array field" / "... $pull to a non-array value"
+    return "non-array" in str(error)
+
+
+def _sharing_fixes(tasks):
+    """(requests, audience) rewriting each legacy shared_with as a list.
+    Each filter pins the old value, so a concurrent write isn't clobbered."""
+    requests, audience = [], set()
+    for task in tasks:
+        users = _shared_users(task)
+        audience.update(users, [task["user_id"]])
+        requests.append(UpdateOne(
+            {"_id": task["_id"], "shared_with": task["shared_with"]},
+            _owned_update({"$set": {"shared_with": users}}),
+        ))
+    return requests, audience
+
+
+def _replaces_sharing(update):
+    # Replacing the whole list drops users, and their cached lists still
+    # show the task, so those updates read the old list first.
+    return task_cache.enabled and "shared_with" in update.get("$set", {})
+
+
+def _update_owned(task_id, user_id, update, expected_version=None):
+    """Apply `update` in one round trip and return the post-image, or None
+    when the task is missing, not owned by the user, or at another version."""
+    query = _owned_query(task_id, user_id, expected_version)
+    if query is None:
+        return None
+    previous = []
+    if _replaces_sharing(update):
+        previous = _shared_users(mongo.db.tasks.find_one(query, {"shared_with": 1}))
+    task = mongo.db.tasks.find_one_and_update(
+        query, _owned_update(update), projection=_hidden_projection(),
+        return_document=ReturnDocument.AFTER,
+    )
+    if task:
+        task_cache.invalidate(user_id, *_shared_users(task), *previous)
+    return task
+
+
+def _with_reminder_state(update_data):
+    # Changing the reminder also reschedules it for the reminder worker.
+    if "reminder" in update_data:
+        update_data = dict(update_data, **reminder_fields(update_data["reminder"]))
+    return update_data
+
+
+def _tombstone_requests(user_id, task_ids):
+    # Keyed by the task id, so recording the same delete twice is harmless.
+    now = datetime.utcnow()
+    return [
+        ReplaceOne({"_id": task_id}, {"user_id": user_id, "deleted_at": now}, upsert=True)
+        for task_id in task_ids
+    ]
+
+
+def _record_tombstones(user_id, task_ids):
+    mongo.db.task_tombstones.bulk_write(_tombstone_requests(user_id, task_ids), ordered=False)
+
+
+def _visible(task_data):
+    return {key: value for key, value in task_data.items() if key not in HIDDEN_FIELDS}
+
+
+def _bulk_ids(operations):
+    return [ObjectId(op["id"]) for op in operations if op["op"] != "create"]
+
+
+def _plan_bulk(user_id, operations, versions):
+    """Turn validated bulk operations into write requests.
+
+    `versions` maps the ids the user owns to their current version. Returns
+    (results, requests, written): one result per operation, the requests to
+    send, and for each request (result index, op, task id, version read).
+    """
+    now = datetime.utcnow()
+    results, requests, written = [], [], []
+    for op in operations:
+        if op["op"] == "create":
+            task_data = _new_task_document(user_id, **op["task"])
+            task_data["_id"] = ObjectId()
+            requests.append(InsertOne(task_data))
+            written.append((len(results), op, task_data["_id"], None))
+            results.append({"status": 201, "_id": task_data["_id"], "version": 1})
+            continue
+
+        task_id = ObjectId(op["id"])
+        version = versions.get(task_id)
+        if version is None:
+            results.append({"status": 404, "_id": task_id, "error": "Task not found or unauthorized"})
+            continue
+        if op.get("version") is not None and op["version"] != version:
+            results.append({"status": 412, "_id": task_id, "error": "Task was modified by another request"})
+            continue
+
+        query = {"_id": task_id, "user_id": user_id, "version": version or None}
+        if op["op"] == "delete":
+            requests.append(DeleteOne(query))
+            results.append({"status": 200, "_id": task_id})
+        else:
+            requests.append(UpdateOne(query, {
+                "$set": dict(_with_reminder_state(op["set"]), updated_at=now),
+                "$inc": {"version": 1},
+            }))
+            results.append({"status": 200, "_id": task_id, "version": version + 1})
+        written.append((len(results) - 1, op, task_id, version))
+    return results, requests, written
+
+
+def _mark_failed(results, written, error):
+    """Flag the requests a BulkWriteError reported as failed."""
+    for position in {e["index"] for e in error.details.get("writeErrors", [])}:
+        result = results[written[position][0]]
+        result.update(status=500, error="Write failed")
+        result.pop("version", None)
+
+
+def _raced(written, outcome):
+    """Updates and deletes that need re-checking after the bulk write.
+
+    Counts only fall short when another request touched a task between the
+    ownership read and the write, so usually this is empty.
+    """
+    expected_updates = sum(1 for _, op, _, _ in written if op["op"] == "update")
+    expected_deletes = sum(1 for _, op, _, _ in written if op["op"] == "delete")
+    if outcome is not None and outcome.matched_count >= expected_updates \
+            and outcome.deleted_count >= expected_deletes:
+        return []
+    return [entry for entry in written if entry[1]["op"] != "create"]
+
+
+def _mark_raced(results, raced, now_versions):
+    for index, op, task_id, version in raced:
+        landed = (task_id not in now_versions if op["op"] == "delete"
+                  else now_versions.get(task_id) == version + 1)
+        if not landed and results[index]["status"] == 200:
+            results[index].update(status=409, error="Task was modified by another request")
+            results[index].pop("version", None)
+
+
+def _bulk_audience(owned, written):
+    """Users other than the owner whose lists a bulk write may change."""
+    users = {user for task in owned for user in _shared_users(task)}
+    for _, op, _, _ in written:
+        users.update(_shared_users(op.get("task") or op.get("set")))
+    return users
+
+
+def _deleted_ids(results, written):
+    return [task_id for index, op, task_id, _ in written
+            if op["op"] == "delete" and results[index]["status"] == 200]
+
+
+def _sharing_update(user_id, task_ids, user_ids, share):
+    """(query, update) adding `user_ids` to, or removing them from, the
+    tasks among `task_ids` that `user_id` owns. Ownership is part of the
+    filter, and tasks that wouldn't change aren't matched, so neither needs
+    a read first and repeating a call doesn't bump versions."""
+    query = {"_id": {"$in": task_ids}, "user_id": user_id}
+    if share:
+        query["shared_with"] = {"$not": {"$all": user_ids}}
+        update = {"$addToSet": {"shared_with": {"$each": user_ids}}}
+    else:
+        query["shared_with"] = {"$in": user_ids}
+        update = {"$pullAll": {"shared_with": user_ids}}
+    return query, _owned_update(update)
+
+
+def _owners(user_id, scope):
+    """Who a listing covers: the user's own tasks, tasks shared with them,
+    or both."""
+    mine, shared = {"user_id": user_id}, {"shared_with": user_id}
+    return {"mine": [mine], "shared": [shared], "all": [mine, shared]}[scope]
+
+
+def _page_query(user_id, sort_key, after, filters, fields, scope="mine"):
+    """(query, projection, sort) for one keyset page of a user's tasks.
+
+    For scope "all" every condition is repeated in both branches of an $or,
+    so each branch walks its own index in sort order and MongoDB merges the
+    two streams (SORT_MERGE) instead of sorting in memory.
+    """
+    filters = filters or {}
+    query = {}
+    if filters.get("status"):
+        query["status"] = {"$in": filters["status"]}
+    if filters.get("priority"):
+        query["priority"] = {"$in": filters["priority"]}
+
+    due_range = {}
+    if filters.get("due_after"):
+        due_range["$gte"] = filters["due_after"]
+    if filters.get("due_before"):
+        due_range["$lte"] = filters["due_before"]
+    if due_range:
+        query["due_date"] = due_range
+
+    direction = SORT_KEYS[sort_key]
+    branches = []
+    for owner in _owners(user_id, scope):
+        branch = dict(owner, **query)
+        if after is not None:
+            branch = {"$and": [branch, keyset_condition(sort_key, direction, *after)]}
+        branches.append(branch)
+    query = branches[0] if len(branches) == 1 else {"$or": branches}
+
+    projection = _hidden_projection()
+    if fields:
+        # The sort key is needed to build the next cursor.
+        projection = {field: 1 for field in fields}
+        projection[sort_key] = 1
+
+    return query, projection, [(sort_key, direction), ("_id", direction)]
+
+
+def _changes_queries(user_id, tasks_after, tombstones_after):
+    """Queries for the task and tombstone streams of GET /tasks/changes."""
+    tasks = {"user_id": user_id}
+    if tasks_after is not None:
+        tasks = {"$and": [tasks, keyset_condition("updated_at", 1, *tasks_after)]}
+    tombstones = {"user_id": user_id}
+    if tombstones_after is not None:
+        tombstones = {"$and": [tombstones, keyset_condition("deleted_at", 1, *tombstones_after)]}
+    return tasks, tombstones
+
+
+_CHANGES_SORT = [("updated_at", 1), ("_id", 1)]
+_TOMBSTONES_SORT = [("deleted_at", 1), ("_id", 1)]
+
+
+def _import_batches(user_id, rows, report, batch_size):
+    """Group parsed import rows into lists of (line, new task document),
+    recording the rows that failed to parse on `report` on the way."""
+    batch = []
+    for line, fields, error in rows:
+        if error:
+            report.error(line, error)
+            continue
+        batch.append((line, _new_task_document(user_id, **fields)))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _record_import(report, batch, error=None):
+    # Inserts are unordered, so only the documents a BulkWriteError names
+    # are missing; the rest of the batch landed.
+    failed = {e["index"] for e in error.details.get("writeErrors", [])} if error else set()
+    for index, (line, _) in enumerate(batch):
+        if index in failed:
+            report.error(line, "Write failed")
+        else:
+            report.imported += 1
+
+
+def _stats_pipeline(user_id, today):
+    """Aggregation behind GET /tasks/stats: one pass over the user's tasks
+    (the $match walks the user_id prefix of user_due_date), fanned out into
+    every count by $facet. Due dates are whole days, so a task is overdue
+    from the day after it is due, and due this week over the next 7 days."""
+    open_tasks = {"status": {"$ne": "Completed"}}
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "status": 1, "priority": 1, "due_date": 1}},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+            "overdue": [
+                {"$match": dict(open_tasks, due_date={"$lt": today})},
+                {"$count": "count"},
+            ],
+            "due_this_week": [
+                {"$match": dict(open_tasks, due_date={"$gte": today, "$lt": today + timedelta(days=7)})},
+                {"$count": "count"},
+            ],
+        }},
+    ]
+
+
+def _stats_from_facets(facets):
+    """Shape the single document _stats_pipeline returns into the response."""
+    by_status = {str(group["_id"]): group["count"] for group in facets["by_status"]}
+    by_priority = {str(group["_id"]): group["count"] for group in facets["by_priority"]}
+    total = sum(by_status.values())
+    completed = by_status.get("Completed", 0)
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "overdue": facets["overdue"][0]["count"] if facets["overdue"] else 0,
+        "due_this_week": facets["due_this_week"][0]["count"] if facets["due_this_week"] else 0,
+        "by_status": by_status,
+        "by_priority": by_priority,
+    }
+
+
+def duplicate_field(error):
+    """Which unique field a DuplicateKeyError from users is about."""
+    key_pattern = (error.details or {}).get("keyPattern")
+    if key_pattern:
+        return next(iter(key_pattern))
+    return "email" if "email_unique" in str(error) else "username"
+
+
 class User:
+    @staticmethod
+    def ensure_indexes():
+        # Sign-up relies on these to reject duplicates atomically, and login
+        # looks users up by username. Email is only unique where it is set.
+        mongo.db.users.create_index("username", name="username_unique", unique=True)
+        mongo.db.users.create_index(
+            "email", name="email_unique", unique=True,
+            partialFilterExpression={"email": {"$type": "string"}},
+        )
+
     @staticmethod
     def create_user(username, email, password):
-        password_hash = generate_password_hash(password)
+        # Raises DuplicateKeyError when the username or email is taken.
+        password_hash = passwords.hash(password)
         user_data = {
             "username": username,
             "email": email,
@@ -21,30 +429,190 @@ class User:
 
     @staticmethod
     def check_password(stored_password, password):
-        return check_password_hash(stored_password, password)
+        return passwords.verify(stored_password, password)
+
+    @staticmethod
+    def rehash_password(user, password):
+        """After a successful login, re-store the password under the current
+        hashing parameters if it was hashed with older ones. Best effort: it
+        is skipped when the hasher is busy, and it never overwrites a hash
+        that changed in the meantime."""
+        if not passwords.needs_rehash(user["password_hash"]):
+            return False
+        try:
+            password_hash = passwords.hash(password)
+        except PasswordHasherBusy:
+            return False
+        result = mongo.db.users.update_one(
+            {"_id": user["_id"], "password_hash": user["password_hash"]},
+            {"$set": {"password_hash": password_hash}},
+        )
+        return result.modified_count == 1
 
 
 class Task:
+    @staticmethod
+    def ensure_indexes():
+        # Each index leads with the equality on user_id, then the optional
+        # equality filters, then the keyset sort so pages never need an
+        # in-memory sort. create_index is a no-op when the index exists.
+        mongo.db.tasks.create_index(
+            [("user_id", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+            name="user_due_date",
+        )
+        mongo.db.tasks.create_index(
+            [("user_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+            name="user_updated_at",
+        )
+        mongo.db.tasks.create_index(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+            name="user_status_due_date",
+        )
+        mongo.db.tasks.create_index(
+            [("user_id", ASCENDING), ("priority", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+            name="user_priority_due_date",
+        )
+        # Multikey indexes for tasks shared with a user (GET /tasks/shared and
+        # the shared half of scope=all), in both sort orders.
+        mongo.db.tasks.create_index(
+            [("shared_with", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+            name="shared_due_date",
+        )
+        mongo.db.tasks.create_index(
+            [("shared_with", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+            name="shared_updated_at",
+        )
+        ensure_reminder_indexes(mongo.db.tasks)
+
+        # Delete tombstones for GET /tasks/changes, read per user in
+        # (deleted_at, _id) order and expired by a TTL index.
+        mongo.db.task_tombstones.create_index(
+            [("user_id", ASCENDING), ("deleted_at", ASCENDING), ("_id", ASCENDING)],
+            name="user_deleted_at",
+        )
+        ttl = current_app.config["TOMBSTONE_TTL_SECONDS"]
+        try:
+            mongo.db.task_tombstones.create_index(
+                "deleted_at", name="deleted_at_ttl", expireAfterSeconds=ttl
+            )
+        except OperationFailure:
+            # The TTL changed since the index was built; update it in place.
+            mongo.db.command(
+                "collMod", "task_tombstones",
+                index={"name": "deleted_at_ttl", "expireAfterSeconds": ttl},
+            )
+
+    @staticmethod
+    def normalize_sharing(query=None):
+        """Convert legacy shared_with values among the tasks matching `query`
+        (all tasks by default) to lists. Returns how many changed."""
+        tasks = list(mongo.db.tasks.find(_legacy_sharing(query or {}), {"user_id": 1, "shared_with": 1}))
+        if not tasks:
+            return 0
+        requests, audience = _sharing_fixes(tasks)
+        result = mongo.db.tasks.bulk_write(requests, ordered=False)
+        task_cache.invalidate(*audience)
+        return result.modified_count
+
+    @staticmethod
+    def schedule_legacy_reminders():
+        """Schedule reminders saved before the reminder worker existed, which
+        may be strings and have no reminder_pending flag. Returns (scheduled,
+        unparseable); unparseable ones are kept but never fire."""
+        from .validation import ValidationError, parse_reminder  # validation imports this module
+
+        legacy = {"reminder_pending": {"$exists": False}, "reminder": {"$ne": None}}
+        tasks = list(mongo.db.tasks.find(legacy, {"user_id": 1, "shared_with": 1, "reminder": 1}))
+        requests, audience, scheduled, unparseable = [], set(), 0, 0
+        for task in tasks:
+            try:
+                reminder = parse_reminder(task["reminder"])
+            except ValidationError:
+                fields = {"reminder_pending": False}
+                unparseable += 1
+            else:
+                # An empty string (the form's "no reminder") becomes None.
+                fields = reminder_fields(reminder)
+                scheduled += reminder is not None
+            requests.append(UpdateOne(
+                dict(legacy, _id=task["_id"], reminder=task["reminder"]),
+                _owned_update({"$set": fields}),
+            ))
+            audience.update(_shared_users(task), [task["user_id"]])
+        if not requests:
+            return 0, 0
+        mongo.db.tasks.bulk_write(requests, ordered=False)
+        task_cache.invalidate(*audience)
+        return scheduled, unparseable
+
     @staticmethod
     def create_task(user_id, title, description, due_date, reminder=None, shared_with=None,status="Pending", priority="Medium"):
-        task_data = {
-            "title": title,
-            "description": description,
-            "due_date": due_date,
-            "status": status,
-            "priority": priority,
-            "user_id": user_id,
-            "reminder": reminder,  # New field for reminders
-            "shared_with": shared_with or [], 
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+        task_data = _new_task_document(
+            user_id, title, description, due_date, reminder, shared_with, status, priority
+        )
+        # insert_one fills in task_data["_id"], so the caller gets the stored
+        # document back without a second round trip.
+        mongo.db.tasks.insert_one(task_data)
+        task_cache.invalidate(user_id, *_shared_users(task_data))
+        return _visible(task_data)
 
-        }
-        return mongo.db.tasks.insert_one(task_data)
+    @staticmethod
+    def bulk_write(user_id, operations):
+        """Apply a batch of validated operations as one unordered bulk write.
+
+        Each operation is a dict with "op" (create/update/delete), and either
+        "task" (create_task keyword arguments) or "id", "set" and "version".
+        Ids are checked against one ownership read first so every item gets
+        its own status; writes stay filtered on user_id and the version that
+        read saw, so nothing that changed in between is overwritten.
+        Returns one result dict per operation, in order.
+        """
+        ids = _bulk_ids(operations)
+        versions, owned = {}, []
+        if ids:
+            owned = list(mongo.db.tasks.find(
+                {"_id": {"$in": ids}, "user_id": user_id}, {"version": 1, "shared_with": 1}
+            ))
+            versions = {task["_id"]: task.get("version", 0) for task in owned}
+
+        results, requests, written = _plan_bulk(user_id, operations, versions)
+        if not requests:
+            return results
+
+        try:
+            outcome = mongo.db.tasks.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            outcome = None
+            _mark_failed(results, written, e)
+
+        raced = _raced(written, outcome)
+        if raced:
+            now_versions = {
+                task["_id"]: task.get("version", 0)
+                for task in mongo.db.tasks.find({"_id": {"$in": [e[2] for e in raced]}}, {"version": 1})
+            }
+            _mark_raced(results, raced, now_versions)
+
+        deleted = _deleted_ids(results, written)
+        if deleted:
+            _record_tombstones(user_id, deleted)
+        task_cache.invalidate(user_id, *_bulk_audience(owned, written))
+        return results
 
     @staticmethod
-    def get_tasks_by_user(user_id):
-        return list(mongo.db.tasks.find({"user_id": user_id}))
+    def get_tasks_page(user_id, sort_key="due_date", limit=100, after=None,
+                       filters=None, fields=None, scope="mine"):
+        """Fetch one keyset page of a user's tasks.
+
+        `after` is the (value, _id) pair decoded from a cursor, `filters` may
+        hold status/priority lists and a due_after/due_before range, and
+        `fields` restricts the projection, and `scope` picks the user's own
+        tasks ("mine"), tasks shared with them ("shared") or both ("all").
+        One extra document is fetched so the caller can tell whether another
+        page exists.
+        """
+        query, projection, sort = _page_query(user_id, sort_key, after, filters, fields, scope)
+        return list(mongo.db.tasks.find(query, projection).sort(sort).limit(limit + 1))
 
     @staticmethod
     def get_task_by_id(task_id):
@@ -56,31 +624,340 @@ class Task:
         return task  # Returns None if task is not found
 
     @staticmethod
-    def update_task(task_id, update_data):
-        return mongo.db.tasks.update_one({"_id": ObjectId(task_id)}, {"$set": update_data})
+    def get_owned_task(task_id, user_id):
+        query = _owned_query(task_id, user_id)
+        if query is None:
+            return None
+        return mongo.db.tasks.find_one(query, _hidden_projection())
+
+    @staticmethod
+    def update_task(task_id, user_id, update_data, expected_version=None):
+        return _update_owned(task_id, user_id, {"$set": _with_reminder_state(update_data)}, expected_version)
+
+    @staticmethod
+    def mark_task_as_completed(task_id, user_id, expected_version=None):
+        return _update_owned(task_id, user_id, {"$set": {"status": "Completed"}}, expected_version)
 
     @staticmethod
-    def delete_task(task_id):
-        return mongo.db.tasks.delete_one({"_id": ObjectId(task_id)})
+    def set_reminder(task_id, user_id, reminder):
+        return _update_owned(task_id, user_id, {"$set": reminder_fields(reminder)})
 
     @staticmethod
-    def mark_task_as_completed(task_id):
-        return mongo.db.tasks.update_one(
-            {"_id": ObjectId(task_id)},
-            {"$set": {"status": "Completed"}}
+    def share_task(task_id, user_id, shared_user_id):
+        update = {"$addToSet": {"shared_with": shared_user_id}}
+        try:
+            return _update_owned(task_id, user_id, update)
+        except OperationFailure as e:
+            # create-indexes converts legacy strings; this covers any written since.
+            if not _is_legacy_sharing_error(e):
+                raise
+            Task.normalize_sharing(_owned_query(task_id, user_id))
+            return _update_owned(task_id, user_id, update)
+
+    @staticmethod
+    def set_sharing(user_id, task_ids, user_ids, share=True):
+        """Share (or unshare) many owned tasks with many users in one write.
+
+        Ids of tasks the user doesn't own are simply not matched. Returns
+        how many tasks changed.
+        """
+        task_ids = [ObjectId(task_id) for task_id in task_ids]
+        query, update = _sharing_update(user_id, task_ids, user_ids, share)
+        try:
+            result = mongo.db.tasks.update_many(query, update)
+        except OperationFailure as e:
+            if not _is_legacy_sharing_error(e):
+                raise
+            # Tasks already updated no longer match the query, so retrying is safe.
+            Task.normalize_sharing({"_id": {"$in": task_ids}, "user_id": user_id})
+            result = mongo.db.tasks.update_many(query, update)
+        if result.modified_count and task_cache.enabled:
+            # Everyone still on those tasks sees the new shared_with list.
+            current = mongo.db.tasks.distinct("shared_with", {"_id": {"$in": task_ids}, "user_id": user_id})
+            task_cache.invalidate(user_id, *user_ids, *current)
+        return result.modified_count
+
+    @staticmethod
+    def delete_task(task_id, user_id, expected_version=None):
+        query = _owned_query(task_id, user_id, expected_version)
+        if query is None:
+            return None
+        task = mongo.db.tasks.find_one_and_delete(query)
+        if task:
+            _record_tombstones(user_id, [task["_id"]])
+            task_cache.invalidate(user_id, *_shared_users(task))
+        return task
+
+    @staticmethod
+    def get_changes(user_id, tasks_after=None, tombstones_after=None, limit=500):
+        """Tasks updated and tombstones written after the given positions.
+
+        Both streams are walked in ascending (timestamp, _id) order, and up to
+        limit + 1 of each is returned so the caller can tell whether more
+        remain.
+        """
+        task_query, tombstone_query = _changes_queries(user_id, tasks_after, tombstones_after)
+        tasks = mongo.db.tasks.find(task_query, _hidden_projection()).sort(_CHANGES_SORT).limit(limit + 1)
+        tombstones = mongo.db.task_tombstones.find(tombstone_query).sort(_TOMBSTONES_SORT).limit(limit + 1)
+        return list(tasks), list(tombstones)
+
+    @staticmethod
+    def export_tasks(user_id, batch_size):
+        """Cursor over all of a user's tasks for GET /tasks/export, in
+        due_date order off the user_due_date index, fetched `batch_size`
+        documents per round trip."""
+        return mongo.db.tasks.find(
+            {"user_id": user_id}, _export_projection(), sort=_EXPORT_SORT, batch_size=batch_size
         )
 
+    @staticmethod
+    def import_tasks(user_id, rows, report, batch_size):
+        """Create tasks from parsed import rows (see transfer.import_rows)
+        with one unordered insert_many per `batch_size` rows, counting
+        results and per-line errors on `report`."""
+        audience = {user_id}
+        for batch in _import_batches(user_id, rows, report, batch_size):
+            error = None
+            try:
+                mongo.db.tasks.insert_many([task for _, task in batch], ordered=False)
+            except BulkWriteError as e:
+                error = e
+            _record_import(report, batch, error)
+            for _, task in batch:
+                audience.update(_shared_users(task))
+        if report.imported:
+            task_cache.invalidate(*audience)
+
+    @staticmethod
+    def get_stats(user_id, today):
+        """Counts of a user's own tasks for the dashboard, relative to
+        `today` (midnight UTC): see _stats_from_facets for the fields."""
+        facets = next(mongo.db.tasks.aggregate(_stats_pipeline(user_id, today)))
+        return _stats_from_facets(facets)
+
     @staticmethod
     def to_dict(task):
-        return {
-            'id': str(task['_id']),
-            'title': task['title'],
-            'description': task['description'],
-            'due_date': task['due_date'].strftime('%Y-%m-%d') if task['due_date'] else None,
-            'status': task['status'],
-            'priority': task['priority'],
-            'user_id': task['user_id'],
-            'reminder': task.get('reminder'),  # Accessed safely with .get
-            'shared_with': task.get('shared_with', []),
-            'created_at': task['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
+        return to_jsonable(task)
+
+
+# Async counterparts used by the ASGI app (app.asgi). They build exactly the
+# same queries and documents as User and Task through the helpers above,
+# and only differ in awaiting Motor instead of calling pymongo.
+
+class AsyncUser:
+    @staticmethod
+    async def create_user(username, email, password):
+        password_hash = await passwords.hash_async(password)
+        user_data = {
+            "username": username,
+            "email": email,
+            "password_hash": password_hash,
+            "tasks": []
         }
+        return await async_mongo.db.users.insert_one(user_data)
+
+    @staticmethod
+    async def find_by_username(username):
+        return await async_mongo.db.users.find_one({"username": username})
+
+    @staticmethod
+    async def check_password(stored_password, password):
+        return await passwords.verify_async(stored_password, password)
+
+    @staticmethod
+    async def rehash_password(user, password):
+        """See User.rehash_password."""
+        if not passwords.needs_rehash(user["password_hash"]):
+            return False
+        try:
+            password_hash = await passwords.hash_async(password)
+        except PasswordHasherBusy:
+            return False
+        result = await async_mongo.db.users.update_one(
+            {"_id": user["_id"], "password_hash": user["password_hash"]},
+            {"$set": {"password_hash": password_hash}},
+        )
+        return result.modified_count == 1
+
+
+async def _update_owned_async(task_id, user_id, update, expected_version=None):
+    query = _owned_query(task_id, user_id, expected_version)
+    if query is None:
+        return None
+    previous = []
+    if _replaces_sharing(update):
+        previous = _shared_users(await async_mongo.db.tasks.find_one(query, {"shared_with": 1}))
+    task = await async_mongo.db.tasks.find_one_and_update(
+        query, _owned_update(update), projection=_hidden_projection(),
+        return_document=ReturnDocument.AFTER,
+    )
+    if task:
+        task_cache.invalidate(user_id, *_shared_users(task), *previous)
+    return task
+
+
+async def _record_tombstones_async(user_id, task_ids):
+    await async_mongo.db.task_tombstones.bulk_write(_tombstone_requests(user_id, task_ids), ordered=False)
+
+
+class AsyncTask:
+    @staticmethod
+    async def create_task(user_id, title, description, due_date, reminder=None, shared_with=None,
+                          status="Pending", priority="Medium"):
+        task_data = _new_task_document(
+            user_id, title, description, due_date, reminder, shared_with, status, priority
+        )
+        await async_mongo.db.tasks.insert_one(task_data)
+        task_cache.invalidate(user_id, *_shared_users(task_data))
+        return _visible(task_data)
+
+    @staticmethod
+    async def bulk_write(user_id, operations):
+        """See Task.bulk_write."""
+        ids = _bulk_ids(operations)
+        versions, owned = {}, []
+        if ids:
+            owned = await async_mongo.db.tasks.find(
+                {"_id": {"$in": ids}, "user_id": user_id}, {"version": 1, "shared_with": 1}
+            ).to_list(length=None)
+            versions = {task["_id"]: task.get("version", 0) for task in owned}
+
+        results, requests, written = _plan_bulk(user_id, operations, versions)
+        if not requests:
+            return results
+
+        try:
+            outcome = await async_mongo.db.tasks.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            outcome = None
+            _mark_failed(results, written, e)
+
+        raced = _raced(written, outcome)
+        if raced:
+            current = async_mongo.db.tasks.find({"_id": {"$in": [e[2] for e in raced]}}, {"version": 1})
+            _mark_raced(results, raced, {task["_id"]: task.get("version", 0) async for task in current})
+
+        deleted = _deleted_ids(results, written)
+        if deleted:
+            await _record_tombstones_async(user_id, deleted)
+        task_cache.invalidate(user_id, *_bulk_audience(owned, written))
+        return results
+
+    @staticmethod
+    async def get_tasks_page(user_id, sort_key="due_date", limit=100, after=None,
+                             filters=None, fields=None, scope="mine"):
+        query, projection, sort = _page_query(user_id, sort_key, after, filters, fields, scope)
+        cursor = async_mongo.db.tasks.find(query, projection).sort(sort).limit(limit + 1)
+        return await cursor.to_list(length=None)
+
+    @staticmethod
+    async def get_owned_task(task_id, user_id):
+        query = _owned_query(task_id, user_id)
+        if query is None:
+            return None
+        return await async_mongo.db.tasks.find_one(query, _hidden_projection())
+
+    @staticmethod
+    async def update_task(task_id, user_id, update_data, expected_version=None):
+        return await _update_owned_async(
+            task_id, user_id, {"$set": _with_reminder_state(update_data)}, expected_version
+        )
+
+    @staticmethod
+    async def mark_task_as_completed(task_id, user_id, expected_version=None):
+        return await _update_owned_async(task_id, user_id, {"$set": {"status": "Completed"}}, expected_version)
+
+    @staticmethod
+    async def set_reminder(task_id, user_id, reminder):
+        return await _update_owned_async(task_id, user_id, {"$set": reminder_fields(reminder)})
+
+    @staticmethod
+    async def normalize_sharing(query=None):
+        """See Task.normalize_sharing."""
+        cursor = async_mongo.db.tasks.find(_legacy_sharing(query or {}), {"user_id": 1, "shared_with": 1})
+        tasks = await cursor.to_list(length=None)
+        if not tasks:
+            return 0
+        requests, audience = _sharing_fixes(tasks)
+        result = await async_mongo.db.tasks.bulk_write(requests, ordered=False)
+        task_cache.invalidate(*audience)
+        return result.modified_count
+
+    @staticmethod
+    async def share_task(task_id, user_id, shared_user_id):
+        update = {"$addToSet": {"shared_with": shared_user_id}}
+        try:
+            return await _update_owned_async(task_id, user_id, update)
+        except OperationFailure as e:
+            if not _is_legacy_sharing_error(e):
+                raise
+            await AsyncTask.normalize_sharing(_owned_query(task_id, user_id))
+            return await _update_owned_async(task_id, user_id, update)
+
+    @staticmethod
+    async def set_sharing(user_id, task_ids, user_ids, share=True):
+        """See Task.set_sharing."""
+        task_ids = [ObjectId(task_id) for task_id in task_ids]
+        query, update = _sharing_update(user_id, task_ids, user_ids, share)
+        try:
+            result = await async_mongo.db.tasks.update_many(query, update)
+        except OperationFailure as e:
+            if not _is_legacy_sharing_error(e):
+                raise
+            await AsyncTask.normalize_sharing({"_id": {"$in": task_ids}, "user_id": user_id})
+            result = await async_mongo.db.tasks.update_many(query, update)
+        if result.modified_count and task_cache.enabled:
+            current = await async_mongo.db.tasks.distinct(
+                "shared_with", {"_id": {"$in": task_ids}, "user_id": user_id}
+            )
+            task_cache.invalidate(user_id, *user_ids, *current)
+        return result.modified_count
+
+    @staticmethod
+    async def delete_task(task_id, user_id, expected_version=None):
+        query = _owned_query(task_id, user_id, expected_version)
+        if query is None:
+            return None
+        task = await async_mongo.db.tasks.find_one_and_delete(query)
+        if task:
+            await _record_tombstones_async(user_id, [task["_id"]])
+            task_cache.invalidate(user_id, *_shared_users(task))
+        return task
+
+    @staticmethod
+    async def get_changes(user_id, tasks_after=None, tombstones_after=None, limit=500):
+        """See Task.get_changes. Both streams are read concurrently."""
+        task_query, tombstone_query = _changes_queries(user_id, tasks_after, tombstones_after)
+        tasks = async_mongo.db.tasks.find(task_query, _hidden_projection()).sort(_CHANGES_SORT).limit(limit + 1)
+        tombstones = async_mongo.db.task_tombstones.find(tombstone_query).sort(_TOMBSTONES_SORT).limit(limit + 1)
+        return tuple(await asyncio.gather(tasks.to_list(length=None), tombstones.to_list(length=None)))
+
+    @staticmethod
+    def export_tasks(user_id, batch_size):
+        """See Task.export_tasks."""
+        return async_mongo.db.tasks.find(
+            {"user_id": user_id}, _export_projection(), sort=_EXPORT_SORT, batch_size=batch_size
+        )
+
+    @staticmethod
+    async def import_tasks(user_id, rows, report, batch_size):
+        """See Task.import_tasks. `rows` is still a plain iterator; it reads
+        a local file, so only the inserts are awaited."""
+        audience = {user_id}
+        for batch in _import_batches(user_id, rows, report, batch_size):
+            error = None
+            try:
+                await async_mongo.db.tasks.insert_many([task for _, task in batch], ordered=False)
+            except BulkWriteError as e:
+                error = e
+            _record_import(report, batch, error)
+            for _, task in batch:
+                audience.update(_shared_users(task))
+        if report.imported:
+            task_cache.invalidate(*audience)
+
+    @staticmethod
+    async def get_stats(user_id, today):
+        """See Task.get_stats."""
+        facets = await async_mongo.db.tasks.aggregate(_stats_pipeline(user_id, today)).to_list(length=1)
+        return _stats_from_facets(facets[0])
@@ -0,0 +1,135 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+
+# Sort keys clients may page on, mapped to the direction we walk them in.
+# due_date pages soonest-first, updated_at pages most-recently-changed first.
+SORT_KEYS = {
+    "due_date": 1,
+    "updated_at": -1,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(payload):
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(token):
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def _position(value, last_id):
+    return [value.isoformat() if isinstance(value, datetime) else None, str(last_id)]
+
+
+def _parse_position(position):
+    value, last_id = position
+    value = datetime.fromisoformat(value) if value is not None else None
+    return value, ObjectId(last_id)
+
+
+def encode_cursor(sort_key, doc):
+    """Build an opaque continuation token from the last document of a page."""
+    value, last_id = _position(doc.get(sort_key), doc["_id"])
+    return _encode({"k": sort_key, "v": value, "i": last_id})
+
+
+def decode_cursor(token, sort_key):
+    """Return (value, ObjectId) for a token produced by encode_cursor."""
+    try:
+        payload = _decode(token)
+        after = _parse_position([payload["v"], payload["i"]])
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+
+    if payload.get("k") != sort_key:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return after
+
+
+def encode_sync_cursor(tasks_after, tombstones_after, issued_at):
+    """Token for GET /tasks/changes: how far the client has read the task
+    stream (updated_at, _id) and the tombstone stream (deleted_at, _id)."""
+    payload = {"t": issued_at.isoformat()}
+    if tasks_after is not None:
+        payload["u"] = _position(*tasks_after)
+    if tombstones_after is not None:
+        payload["d"] = _position(*tombstones_after)
+    return _encode(payload)
+
+
+def decode_sync_cursor(token):
+    """Return (tasks_after, tombstones_after, issued_at)."""
+    try:
+        payload = _decode(token)
+        tasks_after = _parse_position(payload["u"]) if "u" in payload else None
+        tombstones_after = _parse_position(payload["d"]) if "d" in payload else None
+        issued_at = datetime.fromisoformat(payload["t"])
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    return tasks_after, tombstones_after, issued_at
+
+
+def keyset_condition(field, direction, value, last_id):
+    """Query fragment selecting documents strictly after (value, last_id).
+
+    MongoDB sorts null/missing values before everything else, so they come
+    first on an ascending walk and last on a descending one.
+    """
+    if direction == 1:
+        if value is None:
+            return {"$or": [
+                {field: None, "_id": {"$gt": last_id}},
+                {field: {"$ne": None}},
+            ]}
+        return {"$or": [
+            {field: {"$gt": value}},
+            {field: value, "_id": {"$gt": last_id}},
+        ]}
+
+    if value is None:
+        return {field: None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": last_id}},
+        {field: None},
+    ]}
+
+
+def _hold_back(position, settle_at):
+    # Never move a sync cursor past settle_at, so a write stamped just before
+    # a read but committed just after it is re-sent instead of skipped.
+    # Clients apply changes by _id, so seeing one twice is harmless.
+    if position is None or position[0] is None or position[0] <= settle_at:
+        return position
+    return settle_at, ObjectId("0" * 24)
+
+
+def changes_page(tasks, tombstones, limit, now, settle_seconds,
+                 tasks_after=None, tombstones_after=None):
+    """Build the GET /tasks/changes body from what Task.get_changes returned
+    (up to limit + 1 of each stream) and the positions the client sent."""
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+    if tasks:
+        tasks_after = (tasks[-1]["updated_at"], tasks[-1]["_id"])
+    if tombstones:
+        tombstones_after = (tombstones[-1]["deleted_at"], tombstones[-1]["_id"])
+    if not has_more:
+        settle_at = now - timedelta(seconds=settle_seconds)
+        tasks_after = _hold_back(tasks_after, settle_at)
+        tombstones_after = _hold_back(tombstones_after, settle_at)
+
+    return {
+        "changed": tasks,
+        "deleted": [tombstone["_id"] for tombstone in tombstones],
+        "cursor": encode_sync_cursor(tasks_after, tombstones_after, now),
+        "has_more": has_more,
+    }
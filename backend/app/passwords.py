@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# Password hashing is deliberately CPU-heavy. Running it in the request
+# thread lets a burst of logins starve every other request in the worker,
+# so it goes to a small process pool instead, with a cap on how much work
+# may wait for it: past that cap callers get PasswordHasherBusy (a 503)
+# straight away rather than queueing behind the storm.
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _prefix_for(method):
+    """The method part of a hash generate_password_hash(..., method) makes.
+
+    werkzeug accepts short methods ("scrypt", "pbkdf2:sha512") and records
+    them with its defaults filled in; this fills them in the same way,
+    without hashing anything.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = "pbkdf2:sha256:600000"
+        self._method_prefix = _prefix_for(self.method)
+        self.workers = 0
+        self._slots = threading.BoundedSemaphore(4)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config["PASSWORD_HASH_METHOD"]
+        self._method_prefix = _prefix_for(self.method)
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self._slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_MAX_PENDING"])
+
+    def _executor(self):
+        # Created on first use in each process, so gunicorn workers never
+        # share (or fork) a pool. "spawn" keeps the children clear of the
+        # parent's threads and locks.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password):
+        if not self.workers:
+            return generate_password_hash(password, self.method)
+        return self._submit(generate_password_hash, password, self.method).result()
+
+    def verify(self, password_hash, password):
+        if not self.workers:
+            return check_password_hash(password_hash, password)
+        return self._submit(check_password_hash, password_hash, password).result()
+
+    async def hash_async(self, password):
+        if not self.workers:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, generate_password_hash, password, self.method
+            )
+        return await asyncio.wrap_future(self._submit(generate_password_hash, password, self.method))
+
+    async def verify_async(self, password_hash, password):
+        if not self.workers:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, check_password_hash, password_hash, password
+            )
+        return await asyncio.wrap_future(self._submit(check_password_hash, password_hash, password))
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with other parameters than the
+        configured ones ("method$salt$hash", compared on the method)."""
+        return password_hash.split("$", 1)[0] != self._method_prefix
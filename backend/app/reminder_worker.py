@@ -0,0 +1,20 @@
+import logging
+import signal
+import threading
+from app import create_app, mongo, task_cache
+from app.reminders import ReminderWorker
+
+# create_app() sets up logging, so nothing is logged before it.
+app = create_app()
+logging.info("Starting the reminder worker...")
+
+if __name__ == "__main__":
+    stop_event = threading.Event()
+    # Finish the current cycle and exit cleanly when the pod is stopped.
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+
+    with app.app_context():
+        # Only reaches the API's caches when they share a backend (redis).
+        worker = ReminderWorker.from_config(mongo.db.tasks, app.config, on_fired=task_cache.invalidate)
+        worker.run(stop_event)
@@ -0,0 +1,247 @@
+import heapq
+import json
+import logging
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ASCENDING
+
+from .serializers import dumps
+
+# Reminder lifecycle on a task document:
+#   reminder              UTC datetime the reminder is due
+#   reminder_pending      True until it has been delivered
+#   reminder_claim        token of the worker batch holding the lease
+#   reminder_lease_until  when that lease lapses and another worker may claim it
+#   reminder_sent_at      when it was delivered
+#
+# A worker claims reminders due within its horizon, parks them in an
+# in-memory heap and sleeps until the earliest one. Firing is a
+# find_one_and_update conditioned on its own claim token, so a reminder is
+# delivered at most once per claim even with several replicas running; if
+# the user reschedules it in the meantime, set_reminder drops the claim.
+# Firing (and un-firing a failed delivery) changes fields the API returns,
+# so like any other write it bumps updated_at and version, which is what
+# GET /tasks/changes and If-Match go by.
+
+DELIVERY_FIELDS = {"title": 1, "description": 1, "due_date": 1, "user_id": 1, "reminder": 1}
+# Read when firing, to tell on_fired who sees the task; not delivered.
+AUDIENCE_FIELDS = {"shared_with": 1}
+
+
+def reminder_fields(reminder):
+    """The $set document that (re)schedules or clears a task's reminder."""
+    return {
+        "reminder": reminder,
+        "reminder_pending": reminder is not None,
+        "reminder_claim": None,
+        "reminder_lease_until": None,
+        "reminder_sent_at": None,
+    }
+
+
+def ensure_indexes(collection):
+    # Partial, so the index only holds reminders that still have to fire.
+    collection.create_index(
+        [("reminder", ASCENDING)],
+        name="pending_reminders",
+        partialFilterExpression={"reminder_pending": True},
+    )
+
+
+class LogSink:
+    def deliver(self, task):
+        logging.info("Reminder for task %s (%s) to user %s", task['_id'], task.get('title'), task.get('user_id'))
+
+
+class WebhookSink:
+    """POSTs each reminder as JSON. Any non-2xx response or error counts as a
+    failed delivery and the reminder is retried later."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, task):
+        request = urllib.request.Request(
+            self.url, data=dumps(task), method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def build_sink(config):
+    if config.get("REMINDER_SINK") == "webhook":
+        return WebhookSink(config["REMINDER_WEBHOOK_URL"])
+    return LogSink()
+
+
+class ReminderMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.claim_queries = 0
+        self.claimed = 0
+        self.delivered = 0
+        self.failed = 0
+        self.lost_claims = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def record_delivery(self, lag):
+        self.delivered += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "claim_queries": self.claim_queries,
+            "claimed": self.claimed,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "lost_claims": self.lost_claims,
+            "deliveries_per_second": self.delivered / elapsed if elapsed else 0.0,
+            "lag_avg_seconds": self.lag_total / self.delivered if self.delivered else 0.0,
+            "lag_max_seconds": self.lag_max,
+        }
+
+
+class ReminderWorker:
+    def __init__(self, collection, sink, worker_id=None, batch_size=500,
+                 horizon=60, lease=300, poll_interval=10, retry_delay=60,
+                 max_queued=None, on_fired=None):
+        self.collection = collection
+        self.sink = sink
+        self.worker_id = worker_id or uuid.uuid4().hex[:12]
+        self.batch_size = batch_size
+        self.horizon = timedelta(seconds=horizon)
+        self.lease = timedelta(seconds=lease)
+        self.poll_interval = timedelta(seconds=poll_interval)
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.max_queued = max_queued or batch_size * 10
+        # Called with the task's user_id and shared_with users once its
+        # reminder is marked sent.
+        self.on_fired = on_fired
+        self.metrics = ReminderMetrics()
+        self._heap = []
+        self._next_poll = None
+
+    @classmethod
+    def from_config(cls, collection, config, on_fired=None):
+        return cls(
+            collection,
+            build_sink(config),
+            on_fired=on_fired,
+            batch_size=config["REMINDER_BATCH_SIZE"],
+            horizon=config["REMINDER_HORIZON_SECONDS"],
+            lease=config["REMINDER_LEASE_SECONDS"],
+            poll_interval=config["REMINDER_POLL_SECONDS"],
+            retry_delay=config["REMINDER_RETRY_SECONDS"],
+        )
+
+    def claim(self, now):
+        """Lease one batch of reminders due within the horizon.
+
+        The candidates are read from the partial index, then leased with one
+        update_many that re-checks claimability per document, so two workers
+        racing for the same reminder can't both win it.
+        """
+        claimable = {
+            "reminder_pending": True,
+            "reminder": {"$lte": now + self.horizon},
+            "reminder_lease_until": {"$not": {"$gt": now}},
+        }
+        candidates = self.collection.find(claimable, {"_id": 1}) \
+            .sort("reminder", ASCENDING).limit(self.batch_size)
+        ids = [task["_id"] for task in candidates]
+        self.metrics.claim_queries += 1
+        if not ids:
+            return 0
+
+        claim = ObjectId()
+        self.collection.update_many(
+            dict(claimable, _id={"$in": ids}),
+            {"$set": {"reminder_claim": claim, "reminder_lease_until": now + self.lease}},
+        )
+        won = self.collection.find({"_id": {"$in": ids}, "reminder_claim": claim}, {"reminder": 1})
+        count = 0
+        for task in won:
+            heapq.heappush(self._heap, (task["reminder"], task["_id"], claim))
+            count += 1
+        self.metrics.claimed += count
+        return count
+
+    def fire_due(self, now):
+        delivered = 0
+        while self._heap and self._heap[0][0] <= now:
+            due, task_id, claim = heapq.heappop(self._heap)
+
+            task = self.collection.find_one_and_update(
+                {"_id": task_id, "reminder_claim": claim, "reminder_pending": True},
+                {"$set": {"reminder_pending": False, "reminder_sent_at": now,
+                          "reminder_claim": None, "reminder_lease_until": None,
+                          "updated_at": now},
+                 "$inc": {"version": 1}},
+                projection=dict(DELIVERY_FIELDS, **AUDIENCE_FIELDS),
+            )
+            if task is None:
+                # Rescheduled, cleared or re-claimed after our lease lapsed.
+                self.metrics.lost_claims += 1
+                continue
+            shared_with = task.pop("shared_with", None) or []
+            if isinstance(shared_with, str):
+                # Legacy comma-separated value, until create-indexes converts it.
+                shared_with = [user.strip() for user in shared_with.split(",")]
+            if self.on_fired is not None:
+                self.on_fired(task["user_id"], *shared_with)
+
+            try:
+                self.sink.deliver(task)
+            except Exception as e:
+                logging.error("Failed to deliver reminder for task %s: %s", task_id, e)
+                self.metrics.failed += 1
+                self.collection.update_one(
+                    {"_id": task_id, "reminder_sent_at": now, "reminder": due},
+                    {"$set": {"reminder_pending": True, "reminder_sent_at": None,
+                              "reminder_lease_until": now + self.retry_delay,
+                              "updated_at": datetime.utcnow()},
+                     "$inc": {"version": 1}},
+                )
+                continue
+
+            self.metrics.record_delivery((now - due).total_seconds())
+            delivered += 1
+        return delivered
+
+    def run_once(self, now):
+        """Claim if a poll is due, fire what is due and return the time this
+        worker next needs to wake up."""
+        if self._next_poll is None or now >= self._next_poll:
+            # Keep claiming while full batches come back, so a backlog drains
+            # without waiting a poll interval per batch, but don't hold more
+            # than we can fire before the leases lapse.
+            while self.claim(now) == self.batch_size and len(self._heap) < self.max_queued:
+                pass
+            self._next_poll = now + self.poll_interval
+        self.fire_due(now)
+
+        wake = self._next_poll
+        if self._heap and self._heap[0][0] < wake:
+            wake = self._heap[0][0]
+        return wake
+
+    def run(self, stop_event=None, metrics_interval=60):
+        stop_event = stop_event or threading.Event()
+        logging.info("Reminder worker %s started", self.worker_id)
+        last_report = time.monotonic()
+        while not stop_event.is_set():
+            wake = self.run_once(datetime.utcnow())
+            if time.monotonic() - last_report >= metrics_interval:
+                logging.info("Reminder worker metrics: %s", json.dumps(self.metrics.snapshot()))
+                last_report = time.monotonic()
+            stop_event.wait(max((wake - datetime.utcnow()).total_seconds(), 0.05))
+        logging.info("Reminder worker %s stopped", self.worker_id)
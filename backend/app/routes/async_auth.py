@@ -0,0 +1,54 @@
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.asgi import get_json
+from app.models import AsyncUser, duplicate_field
+from app.validation import ValidationError, validate_credentials
+
+# Async versions of the routes in auth.py, for app.asgi.
+
+async def hasher_busy(request, e):
+    return JSONResponse(
+        {"error": "Too many sign-ins in progress. Please retry shortly."}, status_code=503,
+        headers={'Retry-After': str(request.app.config['PASSWORD_HASH_RETRY_AFTER'])},
+    )
+
+async def signup(request):
+    try:
+        username, email, password = validate_credentials(
+            await get_json(request), ('username', 'email', 'password')
+        )
+    except ValidationError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if await AsyncUser.find_by_username(username):
+        return JSONResponse({"error": "Username already exists"}, status_code=409)
+
+    try:
+        await AsyncUser.create_user(username=username, email=email, password=password)
+    except DuplicateKeyError as e:
+        return JSONResponse({"error": f"{duplicate_field(e).capitalize()} already exists"}, status_code=409)
+    return JSONResponse({"message": "User registered successfully!"}, status_code=201)
+
+async def login(request):
+    try:
+        username, password = validate_credentials(await get_json(request), ('username', 'password'))
+    except ValidationError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    user = await AsyncUser.find_by_username(username)
+
+    if user and await AsyncUser.check_password(user['password_hash'], password):
+        await AsyncUser.rehash_password(user, password)
+        access_token = request.app.tokens.create_access_token(str(user['_id']))
+        user_data = {
+            'id': str(user['_id']),
+            'username': user['username'],
+            'email': user['email']
+        }
+        return JSONResponse({"access_token": access_token, "user": user_data}, status_code=200)
+
+    return JSONResponse({"message": "Invalid credentials"}, status_code=401)
+
+routes = [
+    Route('/signup', signup, methods=['POST']),
+    Route('/login', login, methods=['POST']),
+]
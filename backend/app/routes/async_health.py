@@ -0,0 +1,18 @@
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app import async_mongo, readiness
+
+# Async versions of the routes in health.py, for app.asgi.
+
+async def healthz(request):
+    return JSONResponse({"status": "ok"}, status_code=200)
+
+async def readyz(request):
+    if await readiness.check_async(lambda: async_mongo.cx.admin.command('ping')):
+        return JSONResponse({"status": "ready"}, status_code=200)
+    return JSONResponse({"status": "unavailable"}, status_code=503)
+
+routes = [
+    Route('/healthz', healthz, methods=['GET']),
+    Route('/readyz', readyz, methods=['GET']),
+]
@@ -0,0 +1,337 @@
+import logging
+import tempfile
+from datetime import datetime
+from urllib.parse import urlencode
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_etags, quote_etag
+from app import task_cache
+from app.asgi import get_json, jwt_required
+from app.models import AsyncTask
+from app.pagination import InvalidCursor, encode_cursor, decode_sync_cursor, changes_page
+from app.serializers import body_etag, dumps
+from app.transfer import FORMATS, ImportReport, request_format, export_stream_async, import_rows
+from app.validation import (
+    ValidationError, validate_new_task, validate_task_update, validate_bulk_operations,
+    validate_sharing, parse_list_args, parse_reminder, requested_version,
+)
+
+# Async versions of the routes in tasks.py, for app.asgi. Status codes,
+# messages and headers match the Flask routes one for one.
+
+def _json_response(obj, status=200, etag=None):
+    headers = {'ETag': quote_etag(etag)} if etag else None
+    return Response(dumps(obj), status_code=status, media_type='application/json', headers=headers)
+
+def _task_response(task, status=200):
+    return _json_response(task, status, f"{task['_id']}-{task.get('version', 0)}")
+
+def _expected_version(request, data=None):
+    return requested_version(request.path_params['task_id'], request.headers.get('If-Match'), data)
+
+async def _mutation_failed(task_id, user_id, expected_version):
+    if expected_version is not None and await AsyncTask.get_owned_task(task_id, user_id):
+        return JSONResponse({"message": "Task was modified by another request"}, status_code=412)
+    return JSONResponse({"message": "Task not found or unauthorized"}, status_code=404)
+
+@jwt_required
+async def create_task(request):
+    user_id = request.state.user_id
+    try:
+        data = await get_json(request)
+        logging.debug("Received task data: %s", data)
+        try:
+            task_fields = validate_new_task(data)
+        except ValidationError as e:
+            logging.warning("Invalid task data: %s", e)
+            return JSONResponse({"error": str(e)}, status_code=422)
+
+        created_task = await AsyncTask.create_task(user_id=user_id, **task_fields)
+        logging.info("Task %s created for user %s", created_task["_id"], user_id)
+        return _task_response(created_task, 201)
+
+    except Exception as e:
+        logging.error("An error occurred during task creation: %s", e)
+        return JSONResponse({"error": "Failed to create task due to an internal error."}, status_code=500)
+
+async def _list_tasks(request, scope=None):
+    user_id = request.state.user_id
+    args = request.query_params
+    try:
+        sort_key, limit, after, filters, fields, scope = parse_list_args(args, request.app.config, scope)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        # Same variant string as the Flask route, so a shared (redis) cache
+        # serves both apps.
+        cache_key = task_cache.key(user_id, f"{scope}:{urlencode(sorted(args.multi_items()))}")
+        cached = task_cache.get(cache_key)
+
+        if cached is None:
+            tasks = await AsyncTask.get_tasks_page(user_id, sort_key, limit, after, filters, fields, scope)
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = encode_cursor(sort_key, tasks[-1])
+            logging.debug("Fetched %d tasks for user %s", len(tasks), user_id)
+
+            body = dumps(tasks)
+            cached = (body, body_etag(body), next_cursor)
+            task_cache.set(cache_key, *cached)
+
+        body, etag, next_cursor = cached
+        headers = {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        if parse_etags(request.headers.get('If-None-Match')).contains(etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+    except Exception as e:
+        logging.error("Error fetching tasks: %s", e, exc_info=True)
+        return JSONResponse({"error": "Failed to fetch tasks"}, status_code=500)
+
+@jwt_required
+async def get_tasks(request):
+    return await _list_tasks(request)
+
+@jwt_required
+async def get_shared_tasks(request):
+    return await _list_tasks(request, 'shared')
+
+async def _set_sharing(request, share):
+    user_id = request.state.user_id
+    try:
+        task_ids, user_ids = validate_sharing(
+            await get_json(request), user_id, request.app.config['BULK_MAX_OPERATIONS']
+        )
+    except ValidationError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        modified = await AsyncTask.set_sharing(user_id, task_ids, user_ids, share)
+    except Exception as e:
+        logging.error("Error updating task sharing: %s", e)
+        return JSONResponse({"error": "Failed to update sharing due to an internal error."}, status_code=500)
+    return JSONResponse({"modified": modified}, status_code=200)
+
+@jwt_required
+async def share_tasks(request):
+    return await _set_sharing(request, True)
+
+@jwt_required
+async def unshare_tasks(request):
+    return await _set_sharing(request, False)
+
+@jwt_required
+async def get_task_stats(request):
+    user_id = request.state.user_id
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    try:
+        cache_key = task_cache.key(user_id, f"stats:{today:%Y-%m-%d}")
+        cached = task_cache.get(cache_key)
+        if cached is None:
+            body = dumps(await AsyncTask.get_stats(user_id, today))
+            cached = (body, body_etag(body), None)
+            task_cache.set(cache_key, *cached)
+    except Exception as e:
+        logging.error("Error computing task stats: %s", e, exc_info=True)
+        return JSONResponse({"error": "Failed to compute task stats"}, status_code=500)
+
+    body, etag, _ = cached
+    headers = {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
+    if parse_etags(request.headers.get('If-None-Match')).contains(etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+@jwt_required
+async def export_tasks(request):
+    user_id = request.state.user_id
+    try:
+        fmt = request_format(request.query_params.get('format'))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    batch_size = request.app.config['EXPORT_BATCH_SIZE']
+    return StreamingResponse(
+        export_stream_async(AsyncTask.export_tasks(user_id, batch_size), fmt, batch_size),
+        media_type=FORMATS[fmt], headers={'Content-Disposition': f'attachment; filename="tasks.{fmt}"'},
+    )
+
+@jwt_required
+async def import_tasks(request):
+    user_id = request.state.user_id
+    config = request.app.config
+    try:
+        fmt = request_format(request.query_params.get('format'), request.headers.get('content-type'))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    report = ImportReport(config['IMPORT_MAX_ERRORS'])
+    # The parser is synchronous, so the body goes to a temporary file first
+    # (memory stays flat) and is parsed from there between inserts.
+    with tempfile.TemporaryFile() as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            await AsyncTask.import_tasks(user_id, import_rows(body, fmt), report, config['IMPORT_BATCH_SIZE'])
+        except Exception as e:
+            logging.error("Error importing tasks: %s", e, exc_info=True)
+            return JSONResponse({"error": "Failed to import tasks due to an internal error.",
+                                 **report.to_dict()}, status_code=500)
+
+    logging.info("Imported %d tasks for user %s (%d failed)", report.imported, user_id, report.failed)
+    return JSONResponse(report.to_dict(), status_code=200)
+
+@jwt_required
+async def get_task_changes(request):
+    user_id = request.state.user_id
+    config = request.app.config
+    now = datetime.utcnow()
+
+    tasks_after = tombstones_after = None
+    since = request.query_params.get('since')
+    if since:
+        try:
+            tasks_after, tombstones_after, issued_at = decode_sync_cursor(since)
+        except InvalidCursor as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if (now - issued_at).total_seconds() > config['TOMBSTONE_TTL_SECONDS']:
+            return JSONResponse({"error": "Cursor expired. Fetch the full task list and sync again."},
+                                status_code=410)
+
+    limit = config['SYNC_PAGE_SIZE']
+    try:
+        tasks, tombstones = await AsyncTask.get_changes(user_id, tasks_after, tombstones_after, limit)
+    except Exception as e:
+        logging.error("Error fetching task changes: %s", e, exc_info=True)
+        return JSONResponse({"error": "Failed to fetch task changes"}, status_code=500)
+
+    return _json_response(changes_page(
+        tasks, tombstones, limit, now, config['SYNC_SETTLE_SECONDS'], tasks_after, tombstones_after,
+    ))
+
+@jwt_required
+async def bulk_tasks(request):
+    user_id = request.state.user_id
+    data = await get_json(request)
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return JSONResponse({"error": "Expected a non-empty \"operations\" list"}, status_code=400)
+
+    max_operations = request.app.config['BULK_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return JSONResponse({"error": f"Too many operations. At most {max_operations} per request."},
+                            status_code=413)
+
+    results, valid, positions = validate_bulk_operations(operations)
+    try:
+        if valid:
+            for index, result in zip(positions, await AsyncTask.bulk_write(user_id, valid)):
+                results[index] = result
+    except Exception as e:
+        logging.error("Error running bulk task operations: %s", e)
+        return JSONResponse({"error": "Failed to apply bulk operations due to an internal error."},
+                            status_code=500)
+
+    for index, result in enumerate(results):
+        result['index'] = index
+    return _json_response({"results": results})
+
+@jwt_required
+async def update_task(request):
+    user_id = request.state.user_id
+    task_id = request.path_params['task_id']
+    data = await get_json(request)
+
+    try:
+        update_data = validate_task_update(data)
+    except ValidationError as e:
+        logging.error("Error parsing task update: %s", e)
+        return JSONResponse({"message": str(e)}, status_code=400)
+    expected_version = _expected_version(request, data)
+
+    try:
+        updated_task = await AsyncTask.update_task(task_id, user_id, update_data, expected_version)
+        if not updated_task:
+            return await _mutation_failed(task_id, user_id, expected_version)
+        return _task_response(updated_task)
+
+    except Exception as e:
+        logging.error("Error updating task: %s", e)
+        return JSONResponse({"message": "Failed to update task"}, status_code=500)
+
+@jwt_required
+async def delete_task(request):
+    user_id = request.state.user_id
+    task_id = request.path_params['task_id']
+    expected_version = _expected_version(request)
+
+    if not await AsyncTask.delete_task(task_id, user_id, expected_version):
+        return await _mutation_failed(task_id, user_id, expected_version)
+    return JSONResponse({"message": "Task deleted successfully!"}, status_code=200)
+
+@jwt_required
+async def complete_task(request):
+    user_id = request.state.user_id
+    task_id = request.path_params['task_id']
+    expected_version = _expected_version(request)
+
+    updated_task = await AsyncTask.mark_task_as_completed(task_id, user_id, expected_version)
+    if not updated_task:
+        return await _mutation_failed(task_id, user_id, expected_version)
+    return _task_response(updated_task)
+
+@jwt_required
+async def set_reminder(request):
+    user_id = request.state.user_id
+    data = await get_json(request)
+    if not isinstance(data, dict) or 'reminder' not in data:
+        return JSONResponse({"error": "Missing required field: reminder"}, status_code=400)
+
+    try:
+        reminder = parse_reminder(data['reminder'])
+    except ValidationError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if not await AsyncTask.set_reminder(request.path_params['task_id'], user_id, reminder):
+        return JSONResponse({"message": "Task not found or unauthorized"}, status_code=404)
+    return JSONResponse({"message": "Reminder set successfully!"}, status_code=200)
+
+@jwt_required
+async def share_task(request):
+    user_id = request.state.user_id
+    task_id = request.path_params['task_id']
+    data = await get_json(request)
+    shared_user_id = data.get('shared_user_id') if isinstance(data, dict) else None
+    if not isinstance(shared_user_id, str) or not shared_user_id.strip():
+        return JSONResponse({"error": "Missing required field: shared_user_id"}, status_code=400)
+
+    try:
+        task = await AsyncTask.share_task(task_id, user_id, shared_user_id.strip())
+    except Exception as e:
+        logging.error("Error sharing task %s: %s", task_id, e)
+        return JSONResponse({"error": "Failed to share task due to an internal error."}, status_code=500)
+    if not task:
+        return JSONResponse({"message": "Task not found or unauthorized"}, status_code=404)
+    return JSONResponse({"message": "Task shared successfully!"}, status_code=200)
+
+routes = [
+    Route('/tasks', create_task, methods=['POST']),
+    Route('/tasks', get_tasks, methods=['GET']),
+    Route('/tasks/stats', get_task_stats, methods=['GET']),
+    Route('/tasks/export', export_tasks, methods=['GET']),
+    Route('/tasks/import', import_tasks, methods=['POST']),
+    Route('/tasks/changes', get_task_changes, methods=['GET']),
+    Route('/tasks/bulk', bulk_tasks, methods=['POST']),
+    Route('/tasks/shared', get_shared_tasks, methods=['GET']),
+    Route('/tasks/share', share_tasks, methods=['POST']),
+    Route('/tasks/unshare', unshare_tasks, methods=['POST']),
+    Route('/tasks/{task_id}', update_task, methods=['PUT']),
+    Route('/tasks/{task_id}', delete_task, methods=['DELETE']),
+    Route('/tasks/{task_id}/complete', complete_task, methods=['PUT']),
+    Route('/tasks/{task_id}/set_reminder', set_reminder, methods=['PUT']),
+    Route('/tasks/{task_id}/share', share_task, methods=['PUT']),
+]
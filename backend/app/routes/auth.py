@@ -1,24 +1,48 @@
-from flask import Blueprint, request, jsonify
-from app.models import User
+from flask import Blueprint, current_app, request, jsonify
+from pymongo.errors import DuplicateKeyError
+from app.models import User, duplicate_field
+from app.passwords import PasswordHasherBusy
+from app.validation import ValidationError, validate_credentials
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 auth_bp = Blueprint('auth', __name__)
 
+@auth_bp.errorhandler(PasswordHasherBusy)
+def hasher_busy(e):
+    # Every hashing slot is taken: shed the request instead of queueing it.
+    response = jsonify({"error": "Too many sign-ins in progress. Please retry shortly."})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])
+    return response
+
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
-    data = request.get_json()
-    if User.find_by_username(data['username']):
+    try:
+        username, email, password = validate_credentials(
+            request.get_json(silent=True), ('username', 'email', 'password')
+        )
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    # An index probe; the unique indexes still catch a concurrent signup.
+    if User.find_by_username(username):
         return jsonify({"error": "Username already exists"}), 409
 
-    User.create_user(username=data['username'], email=data['email'], password=data['password'])
+    try:
+        User.create_user(username=username, email=email, password=password)
+    except DuplicateKeyError as e:
+        return jsonify({"error": f"{duplicate_field(e).capitalize()} already exists"}), 409
     return jsonify(message="User registered successfully!"), 201
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
-    data = request.get_json()
-    user = User.find_by_username(data['username'])
+    try:
+        username, password = validate_credentials(request.get_json(silent=True), ('username', 'password'))
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    user = User.find_by_username(username)
 
-    if user and User.check_password(user['password_hash'], data['password']):
+    if user and User.check_password(user['password_hash'], password):
+        User.rehash_password(user, password)
         access_token = create_access_token(identity=str(user['_id']))
         user_data = {
             'id': str(user['_id']),
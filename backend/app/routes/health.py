@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from app import mongo, readiness
+
+health_bp = Blueprint('health', __name__)
+
+# Liveness: the process is up and serving. Deliberately doesn't touch
+# MongoDB, so a database outage doesn't get every pod restarted.
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify(status="ok"), 200
+
+# Readiness: this worker can reach MongoDB (see app.health).
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    if readiness.check(lambda: mongo.cx.admin.command('ping')):
+        return jsonify(status="ready"), 200
+    return jsonify(status="unavailable"), 503
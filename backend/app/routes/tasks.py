@@ -1,207 +1,318 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
+from app import task_cache
 from app.models import Task
+from app.pagination import InvalidCursor, encode_cursor, decode_sync_cursor, changes_page
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.serializers import body_etag, dumps, json_response
+from app.transfer import FORMATS, ImportReport, request_format, export_stream, import_rows
+from app.validation import (
+    ValidationError, validate_new_task, validate_task_update, validate_bulk_operations,
+    validate_sharing, parse_list_args, parse_reminder, requested_version,
+)
 from datetime import datetime
-from bson import json_util, ObjectId
-import json
+from urllib.parse import urlencode
+import io
 import logging
 
 tasks_bp = Blueprint('tasks', __name__)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+def _task_response(task, status=200):
+    response = json_response(task, status)
+    response.set_etag(f"{task['_id']}-{task.get('version', 0)}")
+    return response
+
+def _expected_version(task_id, data=None):
+    return requested_version(task_id, request.headers.get('If-Match'), data)
+
+def _mutation_failed(task_id, user_id, expected_version):
+    # Only reached when the write matched nothing, so this read stays off the
+    # success path. It tells a stale version apart from a missing task.
+    if expected_version is not None and Task.get_owned_task(task_id, user_id):
+        return jsonify(message="Task was modified by another request"), 412
+    return jsonify(message="Task not found or unauthorized"), 404
 
 @tasks_bp.route('/tasks', methods=['POST'])
 @jwt_required()
 def create_task():
     user_id = get_jwt_identity()
-    logging.info(f"User ID from JWT: {user_id}")
+    logging.debug("User ID from JWT: %s", user_id)
     try:
         data = request.get_json()
-        logging.info(f"Received task data: {data}")
+        logging.debug("Received task data: %s", data)
         
-        # Check for required fields
-        if 'title' not in data or 'due_date' not in data:
-            logging.warning("Missing required fields: title and due_date")
-            return jsonify({"error": "Missing required fields: title and due_date"}), 422
-            
-        # Validate the due_date format
+        # Check required fields and the due_date format
         try:
-            due_date = datetime.strptime(data['due_date'], '%Y-%m-%d')
-        except ValueError:
-            logging.error("Invalid date format")
-            return jsonify({"error": "Invalid date format. Expected YYYY-MM-DD."}), 422
-        
-        # Create the task in MongoDB
-        result = Task.create_task(
-            user_id=user_id,
-            title=data['title'],
-            description=data.get('description', ''),
-            due_date=due_date,
-            status=data.get('status', 'Pending'),
-            priority=data.get('priority', 'Medium')
-        )
-        task_id = result.inserted_id
+            task_fields = validate_new_task(data)
+        except ValidationError as e:
+            logging.warning("Invalid task data: %s", e)
+            return jsonify({"error": str(e)}), 422
         
-        # ✅ GET THE COMPLETE TASK OBJECT BACK FROM DATABASE
-        created_task = Task.get_task_by_id(task_id)  # You'll need this method
-        # OR if you don't have that method:
-        # created_task = collection.find_one({'_id': task_id})
+        # Create the task in MongoDB; the stored document comes straight back
+        created_task = Task.create_task(user_id=user_id, **task_fields)
         
-        logging.info("Task created successfully!")
+        logging.info("Task %s created for user %s", created_task["_id"], user_id)
         
-        # ✅ CONVERT TO SAME FORMAT AS GET /tasks ROUTE
-        # Convert BSON -> JSON string
-        task_json_str = json_util.dumps(created_task)
-        # Convert JSON string -> Python dict
-        task_json = json.loads(task_json_str)
-        # Convert ObjectId to plain string
-        if "_id" in task_json and "$oid" in task_json["_id"]:
-            task_json["_id"] = str(task_json["_id"]["$oid"])
-            
         # ✅ RETURN COMPLETE TASK OBJECT (same format as GET route)
-        return jsonify(task_json), 201
+        return _task_response(created_task, 201)
         
     except Exception as e:
-        logging.error(f"An error occurred during task creation: {e}")
+        logging.error("An error occurred during task creation: %s", e)
         return jsonify({"error": "Failed to create task due to an internal error."}), 500
 
+def _list_tasks(scope=None):
+    user_id = get_jwt_identity()
+    try:
+        sort_key, limit, after, filters, fields, scope = parse_list_args(
+            request.args, current_app.config, scope
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Each scope and query-string variant of the list is cached on its own
+        variant = f"{scope}:{urlencode(sorted(request.args.items(multi=True)))}"
+        cache_key = task_cache.key(user_id, variant)
+        cached = task_cache.get(cache_key)
+
+        if cached is None:
+            logging.debug("Fetching tasks for user %s", user_id)
+
+            # Get one page of tasks from DB (plus one to detect a next page)
+            tasks = Task.get_tasks_page(user_id, sort_key, limit, after, filters, fields, scope)
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = encode_cursor(sort_key, tasks[-1])
+            logging.debug("Fetched %d tasks for user %s", len(tasks), user_id)
+
+            body = dumps(tasks)
+            cached = (body, body_etag(body), next_cursor)
+            task_cache.set(cache_key, *cached)
+
+        body, etag, next_cursor = cached
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Let browsers keep the list but always revalidate it
+        response.headers['Cache-Control'] = 'private, no-cache'
+        # The body stays a plain list; the continuation token rides in a header
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+
+    except Exception as e:
+        logging.error("Error fetching tasks: %s", e, exc_info=True)
+        return jsonify({"error": "Failed to fetch tasks"}), 500
+
 @tasks_bp.route('/tasks', methods=['GET'])
 @jwt_required()
 def get_tasks():
+    # ?scope=mine (default), shared or all
+    return _list_tasks()
+
+@tasks_bp.route('/tasks/shared', methods=['GET'])
+@jwt_required()
+def get_shared_tasks():
+    return _list_tasks('shared')
+
+def _set_sharing(share):
+    user_id = get_jwt_identity()
     try:
-        user_id = get_jwt_identity()
-        logging.info(f"Fetching tasks for user {user_id}")
+        task_ids, user_ids = validate_sharing(
+            request.get_json(silent=True), user_id, current_app.config['BULK_MAX_OPERATIONS']
+        )
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        modified = Task.set_sharing(user_id, task_ids, user_ids, share)
+    except Exception as e:
+        logging.error("Error updating task sharing: %s", e)
+        return jsonify({"error": "Failed to update sharing due to an internal error."}), 500
+    return jsonify(modified=modified), 200
+
+@tasks_bp.route('/tasks/share', methods=['POST'])
+@jwt_required()
+def share_tasks():
+    return _set_sharing(True)
+
+@tasks_bp.route('/tasks/unshare', methods=['POST'])
+@jwt_required()
+def unshare_tasks():
+    return _set_sharing(False)
 
-        # Get tasks from DB
-        tasks = Task.get_tasks_by_user(user_id)
-        logging.info(f"Tasks fetched from DB: {tasks}")
+@tasks_bp.route('/tasks/stats', methods=['GET'])
+@jwt_required()
+def get_task_stats():
+    user_id = get_jwt_identity()
+    # Overdue and due-this-week counts move at midnight, so the day is part
+    # of the key; any write to the user's tasks bumps their generation.
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    try:
+        cache_key = task_cache.key(user_id, f"stats:{today:%Y-%m-%d}")
+        cached = task_cache.get(cache_key)
+        if cached is None:
+            body = dumps(Task.get_stats(user_id, today))
+            cached = (body, body_etag(body), None)
+            task_cache.set(cache_key, *cached)
+    except Exception as e:
+        logging.error("Error computing task stats: %s", e, exc_info=True)
+        return jsonify({"error": "Failed to compute task stats"}), 500
 
-        # Convert BSON -> JSON string
-        tasks_json_str = json_util.dumps(tasks)
-        logging.debug(f"Tasks JSON string: {tasks_json_str}")
+    body, etag, _ = cached
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
-        # Convert JSON string -> Python list/dict
-        tasks_json = json.loads(tasks_json_str)
-        logging.debug(f"Tasks JSON object: {tasks_json}")
+@tasks_bp.route('/tasks/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    user_id = get_jwt_identity()
+    try:
+        fmt = request_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        # Ensure ObjectId is plain string
-        for task in tasks_json:
-            if "_id" in task and "$oid" in task["_id"]:
-                task["_id"] = str(task["_id"]["$oid"])
-        logging.info("Converted ObjectId fields to strings.")
+    # Streamed straight off the cursor, one batch at a time
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    response = Response(export_stream(Task.export_tasks(user_id, batch_size), fmt, batch_size),
+                        mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="tasks.{fmt}"'
+    return response
 
-        return jsonify(tasks_json), 200
+@tasks_bp.route('/tasks/import', methods=['POST'])
+@jwt_required()
+def import_tasks():
+    user_id = get_jwt_identity()
+    try:
+        fmt = request_format(request.args.get('format'), request.mimetype)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    # The body is parsed as it is read and inserted in batches; bad lines are
+    # reported back without stopping the rest of the import.
+    report = ImportReport(current_app.config['IMPORT_MAX_ERRORS'])
+    try:
+        rows = import_rows(io.BufferedReader(request.stream), fmt)
+        Task.import_tasks(user_id, rows, report, current_app.config['IMPORT_BATCH_SIZE'])
     except Exception as e:
-        logging.error(f"Error fetching tasks: {str(e)}", exc_info=True)
-        return jsonify({"error": "Failed to fetch tasks"}), 500
+        logging.error("Error importing tasks: %s", e, exc_info=True)
+        return jsonify(error="Failed to import tasks due to an internal error.", **report.to_dict()), 500
+
+    logging.info("Imported %d tasks for user %s (%d failed)", report.imported, user_id, report.failed)
+    return jsonify(report.to_dict()), 200
+
+@tasks_bp.route('/tasks/changes', methods=['GET'])
+@jwt_required()
+def get_task_changes():
+    user_id = get_jwt_identity()
+    now = datetime.utcnow()
+
+    tasks_after = tombstones_after = None
+    if request.args.get('since'):
+        try:
+            tasks_after, tombstones_after, issued_at = decode_sync_cursor(request.args['since'])
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        # Tombstones older than the TTL are gone, so deletes could be missed.
+        if (now - issued_at).total_seconds() > current_app.config['TOMBSTONE_TTL_SECONDS']:
+            return jsonify({"error": "Cursor expired. Fetch the full task list and sync again."}), 410
+
+    limit = current_app.config['SYNC_PAGE_SIZE']
+    try:
+        tasks, tombstones = Task.get_changes(user_id, tasks_after, tombstones_after, limit)
+    except Exception as e:
+        logging.error("Error fetching task changes: %s", e, exc_info=True)
+        return jsonify({"error": "Failed to fetch task changes"}), 500
+
+    return json_response(changes_page(
+        tasks, tombstones, limit, now, current_app.config['SYNC_SETTLE_SECONDS'],
+        tasks_after, tombstones_after,
+    ))
+
+@tasks_bp.route('/tasks/bulk', methods=['POST'])
+@jwt_required()
+def bulk_tasks():
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "Expected a non-empty \"operations\" list"}), 400
+
+    max_operations = current_app.config['BULK_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return jsonify({"error": f"Too many operations. At most {max_operations} per request."}), 413
+
+    # Items that fail validation get their own 422 result; the rest still run.
+    results, valid, positions = validate_bulk_operations(operations)
+
+    try:
+        if valid:
+            for index, result in zip(positions, Task.bulk_write(user_id, valid)):
+                results[index] = result
+    except Exception as e:
+        logging.error("Error running bulk task operations: %s", e)
+        return jsonify({"error": "Failed to apply bulk operations due to an internal error."}), 500
+
+    for index, result in enumerate(results):
+        result['index'] = index
+    return json_response({"results": results})
 
 @tasks_bp.route('/tasks/<task_id>', methods=['PUT'])
 @jwt_required()
 def update_task(task_id):
     user_id = get_jwt_identity()
-    task = Task.get_task_by_id(task_id)
+    data = request.get_json()
 
-    if not task or task['user_id'] != user_id:
-        return jsonify(message="Task not found or unauthorized"), 404
+    try:
+        update_data = validate_task_update(data)
+    except ValidationError as e:
+        logging.error("Error parsing task update: %s", e)
+        return jsonify(message=str(e)), 400
+    expected_version = _expected_version(task_id, data)
+
+    try:
+        # Ownership, version check, write and post-image in one round trip
+        updated_task = Task.update_task(task_id, user_id, update_data, expected_version)
+        if not updated_task:
+            return _mutation_failed(task_id, user_id, expected_version)
 
-    data = request.get_json()
-    update_data = {}
-
-    if 'title' in data:
-        update_data['title'] = data['title']
-    if 'description' in data:
-        update_data['description'] = data['description']
-    
-    # ✅ FIXED: Handle different due_date formats
-    if 'due_date' in data:
-        due_date_value = data['due_date']
-        try:
-            # Case 1: String format from frontend form (YYYY-MM-DD)
-            if isinstance(due_date_value, str):
-                update_data['due_date'] = datetime.strptime(due_date_value, '%Y-%m-%d')
-            
-            # Case 2: MongoDB date object format {"$date": "..."}
-            elif isinstance(due_date_value, dict) and '$date' in due_date_value:
-                # Already in correct format for MongoDB
-                update_data['due_date'] = datetime.fromisoformat(due_date_value['$date'].replace('Z', '+00:00'))
-            
-            # Case 3: Already a datetime object
-            elif isinstance(due_date_value, datetime):
-                update_data['due_date'] = due_date_value
-                
-            else:
-                logging.warning(f"Unexpected due_date format: {due_date_value}")
-                # Try to parse as string anyway
-                update_data['due_date'] = datetime.strptime(str(due_date_value), '%Y-%m-%d')
-                
-        except (ValueError, TypeError) as e:
-            logging.error(f"Error parsing due_date: {e}")
-            return jsonify(message="Invalid date format"), 400
-
-    if 'status' in data:
-        update_data['status'] = data['status']
-    if 'priority' in data:
-        update_data['priority'] = data['priority']
-    if 'reminder' in data:
-        update_data['reminder'] = data['reminder']
-    if 'shared_with' in data:
-        update_data['shared_with'] = data['shared_with']
-
-    # Add updated timestamp
-    update_data['updated_at'] = datetime.utcnow()
-
-    try:
-        Task.update_task(task_id, update_data)
-        
         # ✅ Return the updated task in consistent format
-        updated_task = Task.get_task_by_id(task_id)
-        task_json_str = json_util.dumps(updated_task)
-        task_json = json.loads(task_json_str)
-        
-        # Convert ObjectId to string
-        if "_id" in task_json and "$oid" in task_json["_id"]:
-            task_json["_id"] = str(task_json["_id"]["$oid"])
-            
-        return jsonify(task_json), 200
+        return _task_response(updated_task)
         
     except Exception as e:
-        logging.error(f"Error updating task: {e}")
+        logging.error("Error updating task: %s", e)
         return jsonify(message="Failed to update task"), 500
 
 @tasks_bp.route('/tasks/<task_id>', methods=['DELETE'])
 @jwt_required()
 def delete_task(task_id):
     user_id = get_jwt_identity()
-    task = Task.get_task_by_id(task_id)
-
-    if not task or task['user_id'] != user_id:
-        return jsonify(message="Task not found or unauthorized"), 404
+    expected_version = _expected_version(task_id)
 
-    Task.delete_task(task_id)
+    if not Task.delete_task(task_id, user_id, expected_version):
+        return _mutation_failed(task_id, user_id, expected_version)
     return jsonify(message="Task deleted successfully!"), 200
 
 @tasks_bp.route('/tasks/<task_id>/complete', methods=['PUT'])
 @jwt_required()
 def complete_task(task_id):
     user_id = get_jwt_identity()
-    task = Task.get_task_by_id(task_id)
-
-    if not task or task['user_id'] != user_id:
-        return jsonify(message="Task not found or unauthorized"), 404
+    expected_version = _expected_version(task_id)
 
     # Update to use "Completed" status instead of a separate field
-    Task.update_task(task_id, {"status": "Completed", "updated_at": datetime.utcnow()})
-    
+    updated_task = Task.mark_task_as_completed(task_id, user_id, expected_version)
+    if not updated_task:
+        return _mutation_failed(task_id, user_id, expected_version)
+
     # Return the updated task object (same format as other endpoints)
-    updated_task = Task.get_task_by_id(task_id)
-    task_json_str = json_util.dumps(updated_task)
-    task_json = json.loads(task_json_str)
-    if "_id" in task_json and "$oid" in task_json["_id"]:
-        task_json["_id"] = str(task_json["_id"]["$oid"])
-    
-    return jsonify(task_json), 200
+    return _task_response(updated_task)
 
 
 def get_task_by_id(task_id):
@@ -209,31 +320,41 @@ def get_task_by_id(task_id):
         task = Task.get_task_by_id(task_id)  # Assuming this is defined in your Task model
         return task
     except Exception as e:
-        logging.error(f"Error retrieving task by ID {task_id}: {e}")
+        logging.error("Error retrieving task by ID %s: %s", task_id, e)
         return None
 @tasks_bp.route('/tasks/<task_id>/set_reminder', methods=['PUT'])
 @jwt_required()
 def set_reminder(task_id):
     user_id = get_jwt_identity()
-    data = request.get_json()
-    reminder = data.get('reminder')
-    
-    # Check if the reminder is valid
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'reminder' not in data:
+        return jsonify({"error": "Missing required field: reminder"}), 400
+
+    # Same formats as create and update; stored as a UTC datetime, empty clears it
     try:
-        datetime.strptime(reminder, '%Y-%m-%d %H:%M')
-    except ValueError:
-        return jsonify({"error": "Invalid reminder format. Expected format is YYYY-MM-DD HH:MM"}), 400
+        reminder = parse_reminder(data['reminder'])
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
 
-    Task.update_task(task_id, {"reminder": reminder})
+    if not Task.set_reminder(task_id, user_id, reminder):
+        return jsonify(message="Task not found or unauthorized"), 404
     return jsonify(message="Reminder set successfully!"), 200
 
 @tasks_bp.route('/tasks/<task_id>/share', methods=['PUT'])
 @jwt_required()
 def share_task(task_id):
     user_id = get_jwt_identity()
-    data = request.get_json()
-    shared_user_id = data.get('shared_user_id')
+    data = request.get_json(silent=True)
+    shared_user_id = data.get('shared_user_id') if isinstance(data, dict) else None
+    if not isinstance(shared_user_id, str) or not shared_user_id.strip():
+        return jsonify({"error": "Missing required field: shared_user_id"}), 400
 
     # Add shared user to task
-    Task.update_task(task_id, {"$addToSet": {"shared_with": shared_user_id}})
+    try:
+        task = Task.share_task(task_id, user_id, shared_user_id.strip())
+    except Exception as e:
+        logging.error("Error sharing task %s: %s", task_id, e)
+        return jsonify({"error": "Failed to share task due to an internal error."}), 500
+    if not task:
+        return jsonify(message="Task not found or unauthorized"), 404
     return jsonify(message="Task shared successfully!"), 200
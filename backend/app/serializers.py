@@ -0,0 +1,59 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from flask import Response
+
+# orjson is optional: it encodes datetimes natively and is several times
+# faster than the stdlib encoder, but the output is identical either way.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Output schema for every task document:
+#   ObjectId -> "65f1c0ffee..."               (including _id)
+#   datetime -> "2025-08-16T00:00:00Z"        (ISO 8601, UTC, microseconds when non-zero)
+
+
+def format_datetime(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat() + "Z"
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Encode documents straight to JSON bytes in a single pass."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def to_jsonable(obj):
+    """Convert a document to plain Python types using the same schema as dumps."""
+    if isinstance(obj, dict):
+        return {key: to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(value) for value in obj]
+    if isinstance(obj, (ObjectId, datetime)):
+        return _default(obj)
+    return obj
+
+
+def body_etag(body):
+    """Strong ETag for a serialized response body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype="application/json")
@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+from .models import EXPORT_FIELDS
+from .serializers import dumps, format_datetime
+from .validation import ValidationError, validate_import_record
+
+# File formats for GET /tasks/export and POST /tasks/import. Both directions
+# stream: an export encodes one cursor batch at a time and an import reads
+# the body a line at a time, so memory stays flat however large the account
+# or the file is. CSV columns are EXPORT_FIELDS; dates use the API's ISO
+# 8601 form and shared_with is one comma-separated cell, so an export
+# imports back unchanged (apart from new ids).
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def request_format(requested, content_type=None):
+    """The format named by ?format=, else the one the content type implies."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Invalid format. Expected one of: {', '.join(FORMATS)}")
+        return requested
+    return "csv" if content_type and "csv" in content_type else "ndjson"
+
+
+class ImportReport:
+    """Counts for one import, plus the first `max_errors` per-line errors."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)
+    return str(value)
+
+
+def _csv_bytes(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode(tasks, fmt):
+    if fmt == "ndjson":
+        return b"".join(dumps(task) + b"\n" for task in tasks)
+    return _csv_bytes([_csv_cell(task.get(field)) for field in EXPORT_FIELDS] for task in tasks)
+
+
+def _header(fmt):
+    return _csv_bytes([EXPORT_FIELDS]) if fmt == "csv" else b""
+
+
+def export_stream(cursor, fmt, batch_size):
+    """Encoded chunks of a pymongo cursor, one per `batch_size` tasks."""
+    try:
+        yield _header(fmt)
+        while True:
+            batch = list(islice(cursor, batch_size))
+            if not batch:
+                return
+            yield _encode(batch, fmt)
+    finally:
+        cursor.close()
+
+
+async def export_stream_async(cursor, fmt, batch_size):
+    """export_stream for a Motor cursor."""
+    try:
+        yield _header(fmt)
+        while True:
+            batch = await cursor.to_list(length=batch_size)
+            if not batch:
+                return
+            yield _encode(batch, fmt)
+    finally:
+        await cursor.close()
+
+
+def _decoded_lines(stream, last_bad):
+    """Lines of a binary stream as text. Each line is decoded on its own, so
+    bytes that aren't UTF-8 only spoil their line, whose number is left in
+    last_bad[0] for the caller to reject."""
+    for number, raw in enumerate(stream, 1):
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            last_bad[0] = number
+            line = raw.decode("utf-8", "replace")
+        # Spreadsheets like to start files with a byte order mark.
+        yield line.lstrip("\ufeff") if number == 1 else line
+
+
+def _ndjson_records(lines, last_bad):
+    for number, line in enumerate(lines, 1):
+        if last_bad[0] == number:
+            yield number, ValidationError("Invalid UTF-8")
+        elif line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, ValidationError("Invalid JSON")
+
+
+def _csv_records(lines, last_bad):
+    reader = csv.DictReader(lines)
+    previous = reader.line_num
+    # line_num is the last physical line of the record, which is what a
+    # reader expects for all but quoted multi-line cells.
+    for row in reader:
+        if last_bad[0] > previous:
+            yield reader.line_num, ValidationError("Invalid UTF-8")
+        else:
+            yield reader.line_num, {
+                field: value for field, value in row.items() if field is not None and value not in ("", None)
+            }
+        previous = reader.line_num
+
+
+def import_rows(stream, fmt):
+    """Parse an uploaded binary stream lazily.
+
+    `stream` is any binary file object that iterates by line. Yields (line,
+    fields, error): Task.create_task keyword arguments for rows that
+    validate, or the error message for rows that don't.
+    """
+    last_bad = [0]
+    lines = _decoded_lines(stream, last_bad)
+    records = _ndjson_records(lines, last_bad) if fmt == "ndjson" else _csv_records(lines, last_bad)
+    line = 0
+    try:
+        for line, record in records:
+            if isinstance(record, ValidationError):
+                yield line, None, str(record)
+                continue
+            try:
+                yield line, validate_import_record(record), None
+            except ValidationError as e:
+                yield line, None, str(e)
+    except csv.Error as e:
+        # Malformed CSV (a NUL byte, say) leaves the reader unable to go on.
+        yield line + 1, None, f"Invalid CSV: {e}; import stopped"
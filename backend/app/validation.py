@@ -0,0 +1,295 @@
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from werkzeug.http import parse_etags
+
+from .models import TASK_FIELDS
+from .pagination import SORT_KEYS, decode_cursor
+
+# Request checks shared by the single-task routes, POST /tasks/bulk and the
+# async app's routes, so every path accepts and rejects exactly the same input.
+
+UPDATABLE_FIELDS = ("title", "description", "status", "priority", "reminder", "shared_with")
+BULK_OPS = ("create", "update", "complete", "delete")
+SCOPES = ("mine", "shared", "all")
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def parse_date(value):
+    """Parse a due date sent by a client into a naive UTC datetime.
+
+    Accepts the form input format (YYYY-MM-DD), the ISO 8601 strings the API
+    itself returns, and the legacy {"$date": ...} shape.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, dict) and "$date" in value:
+        parsed = datetime.fromisoformat(str(value["$date"]).replace("Z", "+00:00"))
+    elif isinstance(value, str) and len(value) == 10:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    elif isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        raise ValueError(f"Unsupported date value: {value!r}")
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_reminder(value):
+    """Parse an optional reminder time (treated as UTC); empty clears it.
+
+    Accepts "YYYY-MM-DD HH:MM", the browser's datetime-local format
+    (YYYY-MM-DDTHH:MM) and the ISO 8601 strings the API returns.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return parse_date(value)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid reminder format. Expected format is YYYY-MM-DD HH:MM")
+
+
+def validate_credentials(data, fields):
+    """Return `fields` of a signup or login payload, all of them strings."""
+    if not isinstance(data, dict):
+        raise ValidationError("Expected a JSON object")
+    if not all(isinstance(data.get(field), str) for field in fields):
+        raise ValidationError(f"Missing required fields: {', '.join(fields)}")
+    return [data[field] for field in fields]
+
+
+def validate_new_task(data):
+    """Return Task.create_task keyword arguments for a create payload."""
+    if not isinstance(data, dict):
+        raise ValidationError("Expected a JSON object")
+    if "title" not in data or "due_date" not in data:
+        raise ValidationError("Missing required fields: title and due_date")
+
+    try:
+        due_date = datetime.strptime(data["due_date"], "%Y-%m-%d")
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid date format. Expected YYYY-MM-DD.")
+
+    return {
+        "title": data["title"],
+        "description": data.get("description", ""),
+        "due_date": due_date,
+        "reminder": parse_reminder(data.get("reminder")),
+        "status": data.get("status", "Pending"),
+        "priority": data.get("priority", "Medium"),
+    }
+
+
+def validate_import_record(record):
+    """Return Task.create_task keyword arguments for one imported task.
+
+    Unlike a create payload, due_date takes any format parse_date accepts
+    (exports carry full timestamps), and the fields of an exported task
+    that a new task can't keep (_id, timestamps) are ignored.
+    """
+    if not isinstance(record, dict):
+        raise ValidationError("Expected a JSON object")
+    if not record.get("title") or not record.get("due_date"):
+        raise ValidationError("Missing required fields: title and due_date")
+
+    try:
+        due_date = parse_date(record["due_date"])
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid date format")
+
+    return {
+        "title": record["title"],
+        "description": record.get("description") or "",
+        "due_date": due_date,
+        "reminder": parse_reminder(record.get("reminder")),
+        "shared_with": parse_user_ids(record.get("shared_with")),
+        "status": record.get("status") or "Pending",
+        "priority": record.get("priority") or "Medium",
+    }
+
+
+def validate_task_update(data):
+    """Return the $set document for an update payload."""
+    if not isinstance(data, dict):
+        raise ValidationError("Expected a JSON object")
+
+    update_data = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+    if "shared_with" in update_data:
+        update_data["shared_with"] = parse_user_ids(update_data["shared_with"])
+    if "due_date" in data:
+        try:
+            update_data["due_date"] = parse_date(data["due_date"])
+        except (ValueError, TypeError):
+            raise ValidationError("Invalid date format")
+    if "reminder" in data:
+        update_data["reminder"] = parse_reminder(data["reminder"])
+    return update_data
+
+
+def parse_user_ids(value):
+    """A list of user ids, also accepted as one comma-separated string
+    (what the task forms send)."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(user, str) for user in value):
+        raise ValidationError("Expected a list of user ids")
+    users = []
+    for user in (user.strip() for user in value):
+        if user and user not in users:
+            users.append(user)
+    return users
+
+
+def validate_sharing(data, user_id, max_tasks):
+    """Return (task_ids, user_ids) for POST /tasks/share and /tasks/unshare."""
+    if not isinstance(data, dict):
+        raise ValidationError("Expected a JSON object")
+    task_ids = data.get("task_ids")
+    if not isinstance(task_ids, list) or not task_ids:
+        raise ValidationError("Expected a non-empty \"task_ids\" list")
+    if len(task_ids) > max_tasks:
+        raise ValidationError(f"Too many tasks. At most {max_tasks} per request.")
+    if not all(isinstance(task_id, str) and ObjectId.is_valid(task_id) for task_id in task_ids):
+        raise ValidationError("Invalid task id")
+
+    # Sharing a task with its owner would list it twice for them.
+    user_ids = [user for user in parse_user_ids(data.get("user_ids")) if user != user_id]
+    if not user_ids:
+        raise ValidationError("Expected a non-empty \"user_ids\" list")
+    return task_ids, user_ids
+
+
+def validate_bulk_operation(item, seen_ids):
+    """Normalise one POST /tasks/bulk item for Task.bulk_write.
+
+    "complete" becomes an update of status, and `seen_ids` rejects a second
+    operation on the same task within one batch, since unordered bulk writes
+    don't guarantee the order those would run in.
+    """
+    if not isinstance(item, dict):
+        raise ValidationError("Expected a JSON object")
+    op = item.get("op")
+    if op not in BULK_OPS:
+        raise ValidationError(f"Invalid op. Expected one of: {', '.join(BULK_OPS)}")
+    if op == "create":
+        return {"op": "create", "task": validate_new_task(item.get("task"))}
+
+    task_id = item.get("id")
+    if not isinstance(task_id, str) or not ObjectId.is_valid(task_id):
+        raise ValidationError("Invalid task id")
+    if task_id in seen_ids:
+        raise ValidationError("Each task may appear only once per batch")
+
+    version = item.get("version")
+    if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+        raise ValidationError("Invalid version. Expected an integer.")
+
+    if op == "delete":
+        operation = {"op": "delete", "id": task_id, "version": version}
+    elif op == "complete":
+        operation = {"op": "update", "id": task_id, "set": {"status": "Completed"}, "version": version}
+    else:
+        operation = {"op": "update", "id": task_id, "set": validate_task_update(item.get("task")),
+                     "version": version}
+    seen_ids.add(task_id)
+    return operation
+
+
+def validate_bulk_operations(operations):
+    """Validate every item of a POST /tasks/bulk request.
+
+    Returns (results, valid, positions): items that fail get their own 422
+    result, the rest are returned for Task.bulk_write along with their
+    positions in the request.
+    """
+    results = [None] * len(operations)
+    valid, positions, seen_ids = [], [], set()
+    for index, item in enumerate(operations):
+        try:
+            valid.append(validate_bulk_operation(item, seen_ids))
+            positions.append(index)
+        except ValidationError as e:
+            results[index] = {"status": 422, "error": str(e)}
+    return results, valid, positions
+
+
+def _split_param(args, name):
+    value = args.get(name)
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_list_args(args, config, scope=None):
+    """Turn GET /tasks query parameters into get_tasks_page arguments.
+
+    `scope` fixes the listing scope instead of reading ?scope=. Raises
+    ValueError (or InvalidCursor) with a message for the client.
+    """
+    scope = scope or args.get("scope", "mine")
+    if scope not in SCOPES:
+        raise ValueError(f"Invalid scope. Expected one of: {', '.join(SCOPES)}")
+
+    sort_key = args.get("sort", "due_date")
+    if sort_key not in SORT_KEYS:
+        raise ValueError(f"Invalid sort. Expected one of: {', '.join(SORT_KEYS)}")
+
+    max_limit = config["TASKS_MAX_PAGE_SIZE"]
+    try:
+        limit = int(args.get("limit", config["TASKS_PAGE_SIZE"]))
+    except ValueError:
+        raise ValueError("Invalid limit. Expected an integer.")
+    if not 1 <= limit <= max_limit:
+        raise ValueError(f"Invalid limit. Expected a value between 1 and {max_limit}.")
+
+    after = None
+    if args.get("cursor"):
+        after = decode_cursor(args["cursor"], sort_key)
+
+    filters = {
+        "status": _split_param(args, "status"),
+        "priority": _split_param(args, "priority"),
+    }
+    for name in ("due_after", "due_before"):
+        if args.get(name):
+            try:
+                filters[name] = datetime.strptime(args[name], "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Invalid {name}. Expected YYYY-MM-DD.")
+
+    fields = _split_param(args, "fields")
+    unknown = [field for field in fields if field not in TASK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return sort_key, limit, after, filters, fields, scope
+
+
+def requested_version(task_id, if_match=None, data=None):
+    """Version the client last saw, from an If-Match header value or a
+    "version" body field.
+
+    None means "no precondition". An ETag that belongs to another task, or a
+    malformed version, maps to -1 so the write matches nothing.
+    """
+    if if_match:
+        etags = parse_etags(if_match)
+        if etags.star_tag:
+            return None
+        for tag in etags.as_set(include_weak=True):
+            prefix, _, version = tag.rpartition("-")
+            if prefix == task_id and version.isdigit():
+                return int(version)
+        return -1
+    if isinstance(data, dict) and data.get("version") is not None:
+        try:
+            return int(data["version"])
+        except (TypeError, ValueError):
+            return -1
+    return None
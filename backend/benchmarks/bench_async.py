@@ -0,0 +1,193 @@
+"""Load test: the Flask app on sync gunicorn workers against the async app on
+uvicorn workers, at the same client concurrency and worker count.
+
+Both servers run as real gunicorn processes against a real MongoDB
+(BENCH_MONGO_URI, required) with the task cache off, so every request goes
+to the database. The client keeps --concurrency requests in flight for
+--duration seconds, and the servers' memory is sampled from /proc (RSS of
+the master plus its workers) while it runs.
+
+Run from backend/:
+    BENCH_MONGO_URI=mongodb://localhost:27017/planit_bench \\
+        python -m benchmarks.bench_async [--concurrency 64] [--workers 4] [--duration 20]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+SECRET = "benchmark-secret-key-of-sufficient-length"
+USER_ID = "65f1c0ffee0000000000beef"
+
+SERVERS = {
+    # gunicorn.conf.py defaults to gthread; the baseline is plain sync workers.
+    "sync": ["gunicorn", "-k", "sync", "app.main:app"],
+    "async": ["gunicorn", "-k", "uvicorn.workers.UvicornWorker", "app.asgi:create_async_app()"],
+}
+
+
+def seed(uri, count):
+    db = MongoClient(uri).get_default_database()
+    db.tasks.delete_many({"user_id": USER_ID})
+    now = datetime.utcnow()
+    db.tasks.insert_many([{
+        "title": f"Task {i}",
+        "description": "Lorem ipsum dolor sit amet " * 3,
+        "due_date": now + timedelta(days=i % 60),
+        "status": "Pending",
+        "priority": "Medium",
+        "user_id": USER_ID,
+        "reminder": None,
+        "shared_with": [],
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    } for i in range(count)])
+
+
+def rss_bytes(pid):
+    """RSS of a process and all its children, from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            pass
+    return total
+
+
+async def fetch(port, path, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n"
+    ).encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def drive(port, path, token, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path, token)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def sample_memory(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_bytes(pid))
+        await asyncio.sleep(0.5)
+
+
+async def measure(pid, port, path, token, args):
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.ensure_future(sample_memory(pid, samples, stop))
+    latencies, errors = await drive(port, path, token, args.concurrency, args.duration)
+    stop.set()
+    await sampler
+    return latencies, errors, samples
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(fetch(port, "/healthz", ""))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def run_server(mode, port, args, token):
+    env = dict(
+        os.environ,
+        MONGO_URI=os.environ["BENCH_MONGO_URI"],
+        JWT_SECRET_KEY=SECRET,
+        SECRET_KEY=SECRET,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        TASK_CACHE_BACKEND="none",
+        LOG_LEVEL="WARNING",
+        LOG_REQUESTS="false",
+    )
+    command = SERVERS[mode] + ["--workers", str(args.workers)]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        path = f"/tasks?limit={args.limit}"
+        # Warm up: imports, connection pools, first queries.
+        asyncio.run(drive(port, path, token, args.concurrency, 2))
+        return asyncio.run(measure(server.pid, port, path, token, args))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    if not os.getenv("BENCH_MONGO_URI"):
+        sys.exit("bench_async needs a real MongoDB: set BENCH_MONGO_URI")
+
+    from app.aio import Tokens
+    seed(os.environ["BENCH_MONGO_URI"], args.tasks)
+    token = Tokens({"JWT_SECRET_KEY": SECRET}).create_access_token(USER_ID)
+
+    print(f"{args.concurrency} concurrent clients, {args.workers} workers, GET /tasks?limit={args.limit}")
+    print(f"{'mode':6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak RSS MB':>12}")
+    for mode in SERVERS:
+        latencies, errors, samples = run_server(mode, args.port, args, token)
+        latencies.sort()
+        print(f"{mode:6} {len(latencies) / args.duration:9.1f} "
+              f"{percentile(latencies, 0.5) * 1e3:8.2f} {percentile(latencies, 0.99) * 1e3:8.2f} "
+              f"{errors:7d} {max(samples, default=0) / 2**20:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
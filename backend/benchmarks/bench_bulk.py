@@ -0,0 +1,70 @@
+"""Requests/sec and operations/sec of POST /tasks/bulk vs the single-item routes.
+
+Run from backend/:  python -m benchmarks.bench_bulk [--tasks 2000] [--batch 100]
+"""
+import argparse
+import time
+
+from benchmarks.common import auth_headers, create_bench_app
+
+
+def run_single(client, headers, count):
+    start = time.perf_counter()
+    ids = []
+    for i in range(count):
+        response = client.post("/tasks", json={"title": f"Task {i}", "due_date": "2025-01-01"}, headers=headers)
+        ids.append(response.get_json()["_id"])
+    create_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        client.put(f"/tasks/{task_id}/complete", headers=headers)
+    complete_elapsed = time.perf_counter() - start
+    return (count, create_elapsed), (count, complete_elapsed)
+
+
+def run_bulk(client, headers, count, batch):
+    start = time.perf_counter()
+    ids, requests = [], 0
+    for offset in range(0, count, batch):
+        operations = [{"op": "create", "task": {"title": f"Task {i}", "due_date": "2025-01-01"}}
+                      for i in range(offset, min(offset + batch, count))]
+        response = client.post("/tasks/bulk", json={"operations": operations}, headers=headers)
+        ids.extend(result["_id"] for result in response.get_json()["results"])
+        requests += 1
+    create_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    complete_requests = 0
+    for offset in range(0, count, batch):
+        operations = [{"op": "complete", "id": task_id} for task_id in ids[offset:offset + batch]]
+        client.post("/tasks/bulk", json={"operations": operations}, headers=headers)
+        complete_requests += 1
+    complete_elapsed = time.perf_counter() - start
+    return (requests, create_elapsed), (complete_requests, complete_elapsed)
+
+
+def report(label, count, requests, elapsed):
+    print(f"{label:<22} {requests:>8} {elapsed:>9.2f} {requests / elapsed:>10.1f} {count / elapsed:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    app, client = create_bench_app()
+    print(f"{'path':<22} {'requests':>8} {'seconds':>9} {'req/s':>10} {'ops/s':>10}")
+
+    create, complete = run_single(client, auth_headers(app, "bench-single"), args.tasks)
+    report("single create", args.tasks, *create)
+    report("single complete", args.tasks, *complete)
+
+    create, complete = run_bulk(client, auth_headers(app, "bench-bulk"), args.tasks, args.batch)
+    report(f"bulk create x{args.batch}", args.tasks, *create)
+    report(f"bulk complete x{args.batch}", args.tasks, *complete)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Cost of logging on the GET /tasks path.
+
+First the per-request logging work on its own: the old setup (the fetched
+list formatted into an INFO line, written synchronously by two handlers)
+against the current one (a lazy DEBUG line plus one access-log record on
+the queue). Then end-to-end GET /tasks latency with logging off, queued and
+written synchronously from the request thread. Output goes to /dev/null.
+
+Run from backend/:  python -m benchmarks.bench_logging [--tasks 500] [--requests 2000]
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import auth_headers, create_bench_app
+
+
+def seed(app, user_id, count):
+    from app import mongo
+    now = datetime.utcnow()
+    with app.app_context():
+        mongo.db.tasks.insert_many([{
+            "title": f"Task {i}",
+            "description": "Lorem ipsum dolor sit amet " * 3,
+            "due_date": now + timedelta(days=i % 60),
+            "status": "Pending",
+            "priority": "Medium",
+            "user_id": user_id,
+            "reminder": None,
+            "shared_with": [],
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        } for i in range(count)])
+
+
+def time_requests(client, headers, limit, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        # A fresh query string each time, so every request misses the cache
+        # and does the full fetch + serialize.
+        client.get(f"/tasks?limit={limit}&_={time.perf_counter_ns()}", headers=headers)
+    return (time.perf_counter() - start) / iterations
+
+
+def time_log_calls(app, user_id, limit, devnull, iterations):
+    from app.models import Task
+    from app.logging_config import configure_logging
+    root = logging.getLogger()
+    access = logging.getLogger("app.access")
+    with app.app_context():
+        tasks = Task.get_tasks_page(user_id, "due_date", limit)
+
+    # What every GET /tasks used to do: basicConfig's handler plus a second
+    # StreamHandler, both formatting and writing the whole list.
+    logging.disable(logging.NOTSET)
+    root.handlers[:] = [logging.StreamHandler(devnull), logging.StreamHandler(devnull)]
+    root.setLevel(logging.INFO)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        logging.info(f"Tasks fetched from DB: {tasks}")
+    legacy = (time.perf_counter() - start) / iterations
+
+    configure_logging(app, stream=devnull)
+    with app.test_request_context("/tasks"):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            logging.debug("Fetched %d tasks for user %s", len(tasks), user_id)
+            access.info("%s %s %s %.2fms", "GET", "/tasks", 200, 1.0,
+                        extra={"method": "GET", "path": "/tasks", "status": 200, "duration_ms": 1.0})
+        current = (time.perf_counter() - start) / iterations
+    return legacy, current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.logging_config import JsonFormatter, configure_logging
+    app, client = create_bench_app()
+    user_id = "65f1c0ffee0000000000beef"
+    seed(app, user_id, args.tasks)
+    headers = auth_headers(app, user_id)
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+
+    def off():
+        logging.disable(logging.CRITICAL)
+
+    def queued():
+        logging.disable(logging.NOTSET)
+        configure_logging(app, stream=devnull)
+
+    def synchronous():
+        logging.disable(logging.NOTSET)
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(JsonFormatter())
+        root.handlers[:] = [handler]
+
+    legacy, current = time_log_calls(app, user_id, args.tasks, devnull, args.requests)
+    print(f"log calls, old setup     {legacy * 1e6:9.1f} us/request")
+    print(f"log calls, queued        {current * 1e6:9.1f} us/request")
+
+    modes = [("logging off", off), ("queued JSON", queued), ("synchronous JSON", synchronous)]
+    best = {name: float("inf") for name, _ in modes}
+    # Alternate the modes and keep the best round of each.
+    rounds = 5
+    for _ in range(rounds):
+        for name, setup in modes:
+            setup()
+            best[name] = min(best[name], time_requests(client, headers, args.tasks, args.requests // rounds))
+
+    baseline = best["logging off"]
+    for name, _ in modes:
+        print(f"{name:24} {best[name] * 1e6:9.1f} us/request  ({(best[name] - baseline) * 1e6:+.1f})")
+
+
+if __name__ == "__main__":
+    main()
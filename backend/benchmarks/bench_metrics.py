@@ -0,0 +1,60 @@
+"""Per-request cost of the /metrics instrumentation.
+
+Measures the before/after/teardown hooks on their own, then end-to-end
+latency of a cheap route with instrumentation on and off.
+
+Run from backend/:  python -m benchmarks.bench_metrics [--requests 20000]
+"""
+import argparse
+import time
+
+from benchmarks.common import create_bench_app
+
+
+def time_hooks(app, iterations):
+    from app import metrics
+    response = app.response_class("ok")
+    with app.test_request_context("/healthz"):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            metrics._before_request()
+            metrics._after_request(response)
+            metrics._teardown_request(None)
+        return (time.perf_counter() - start) / iterations
+
+
+def time_requests(client, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        client.get("/healthz")
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    from app.config import Config
+    Config.METRICS_ENABLED = False
+    _, plain_client = create_bench_app()
+    Config.METRICS_ENABLED = True
+    app, instrumented_client = create_bench_app()
+
+    hooks = time_hooks(app, args.requests)
+    # Alternate the two apps and keep the best round of each, so drift in
+    # machine load doesn't land on one side only.
+    rounds = 5
+    plain = instrumented = float("inf")
+    for _ in range(rounds):
+        plain = min(plain, time_requests(plain_client, args.requests // rounds))
+        instrumented = min(instrumented, time_requests(instrumented_client, args.requests // rounds))
+
+    print(f"hooks only            {hooks * 1e6:8.2f} us/request")
+    print(f"request, metrics off  {plain * 1e6:8.2f} us/request")
+    print(f"request, metrics on   {instrumented * 1e6:8.2f} us/request")
+    print(f"overhead              {(instrumented - plain) * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
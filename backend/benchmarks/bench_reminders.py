@@ -0,0 +1,110 @@
+"""Simulate the reminder worker against many reminders on a virtual clock.
+
+Several workers (standing in for replicas) share one collection; time jumps
+straight to whichever worker wakes next, so a long schedule replays in
+seconds. The run fails if any reminder is delivered twice or not at all.
+
+Run from backend/:  python -m benchmarks.bench_reminders [--reminders N] [--workers 3]
+
+Point BENCH_MONGO_URI at a local mongod for the full 100k-reminder run.
+Without it mongomock stands in, and since it scans the whole collection on
+every query the default drops to 2k reminders.
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.reminders import ReminderWorker, ensure_indexes, reminder_fields
+
+
+class CollectingSink:
+    def __init__(self):
+        self.deliveries = Counter()
+
+    def deliver(self, task):
+        self.deliveries[task["_id"]] += 1
+
+
+def get_collection():
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        import pymongo
+        collection = pymongo.MongoClient(uri).get_database().reminder_bench
+    else:
+        import mongomock
+        collection = mongomock.MongoClient().planit_bench.reminder_bench
+    collection.drop()
+    ensure_indexes(collection)
+    return collection
+
+
+def seed(collection, count, start, window, overdue):
+    batch = []
+    for i in range(count):
+        # A slice of reminders is already overdue, as after an outage.
+        offset = -random.uniform(0, 300) if random.random() < overdue else random.uniform(0, window)
+        batch.append(dict(reminder_fields(start + timedelta(seconds=offset)), title=f"Task {i}", user_id=f"user-{i % 1000}"))
+        if len(batch) == 10_000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int,
+                        default=100_000 if os.getenv("BENCH_MONGO_URI") else 2_000)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--window", type=int, default=3600, help="seconds the reminders are spread over")
+    parser.add_argument("--overdue", type=float, default=0.1, help="fraction already due at start")
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(42)
+    collection = get_collection()
+    start = datetime.utcnow().replace(microsecond=0)
+    seed(collection, args.reminders, start, args.window, args.overdue)
+
+    sink = CollectingSink()
+    # Each worker holds at most one batch, so claims spread across replicas.
+    workers = [ReminderWorker(collection, sink, worker_id=f"sim-{i}", batch_size=args.batch,
+                              max_queued=args.batch)
+               for i in range(args.workers)]
+
+    now, end = start, start + timedelta(seconds=args.window + 600)
+    wall_start = time.perf_counter()
+    while now <= end and len(sink.deliveries) < args.reminders:
+        random.shuffle(workers)
+        now = min(worker.run_once(now) for worker in workers)
+    workers.sort(key=lambda worker: worker.worker_id)
+    wall = time.perf_counter() - wall_start
+
+    duplicates = sum(1 for count in sink.deliveries.values() if count > 1)
+    missing = args.reminders - len(sink.deliveries)
+    delivered = sum(worker.metrics.delivered for worker in workers)
+    lag_max = max(worker.metrics.lag_max for worker in workers)
+    lag_avg = sum(worker.metrics.lag_total for worker in workers) / max(delivered, 1)
+
+    print(f"reminders            {args.reminders}")
+    print(f"workers              {args.workers}")
+    print(f"delivered            {delivered}")
+    print(f"duplicates           {duplicates}")
+    print(f"missing              {missing}")
+    print(f"claim queries        {sum(worker.metrics.claim_queries for worker in workers)}")
+    print(f"lost claims          {sum(worker.metrics.lost_claims for worker in workers)}")
+    print(f"wall seconds         {wall:.2f}")
+    print(f"deliveries/second    {delivered / wall:.1f}")
+    print(f"lag avg/max seconds  {lag_avg:.2f} / {lag_max:.2f}  (virtual time)")
+    for worker in workers:
+        print(f"  {worker.worker_id}: delivered {worker.metrics.delivered}, claimed {worker.metrics.claimed}")
+
+    if duplicates or missing:
+        raise SystemExit("FAILED: reminders were double-fired or dropped")
+
+
+if __name__ == "__main__":
+    main()
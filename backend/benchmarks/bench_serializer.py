@@ -0,0 +1,77 @@
+"""Compare the single-pass task serializer with the old json_util round trip.
+
+Run from backend/:  python -m benchmarks.bench_serializer
+"""
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from bson import json_util
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+
+from app import serializers
+
+
+def make_tasks(count):
+    now = datetime.utcnow().replace(microsecond=0)
+    return [{
+        "_id": ObjectId(),
+        "title": f"Task {i}",
+        "description": "Lorem ipsum dolor sit amet " * 3,
+        "due_date": now + timedelta(days=random.randint(0, 60)),
+        "status": random.choice(["Pending", "Completed"]),
+        "priority": random.choice(["Low", "Medium", "High"]),
+        "user_id": "65f1c0ffee0000000000beef",
+        "reminder": None,
+        "shared_with": [],
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(count)]
+
+
+def old_path(tasks):
+    tasks_json = json.loads(json_util.dumps(tasks))
+    for task in tasks_json:
+        if "_id" in task and "$oid" in task["_id"]:
+            task["_id"] = str(task["_id"]["$oid"])
+    return jsonify(tasks_json).get_data()
+
+
+def new_path(tasks):
+    return serializers.json_response(tasks).get_data()
+
+
+def best_of(fn, tasks, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(tasks)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    app = Flask(__name__)
+    fast_encoder = serializers.orjson
+    with app.app_context():
+        print(f"{'tasks':>7} {'path':<18} {'best ms':>9} {'bytes':>10} {'speedup':>8}")
+        for count in (1_000, 10_000):
+            tasks = make_tasks(count)
+            repeat = 20 if count <= 1_000 else 5
+            baseline, size = best_of(old_path, tasks, repeat)
+            print(f"{count:>7} {'json_util+jsonify':<18} {baseline * 1000:>9.2f} {size:>10} {1:>7.1f}x")
+
+            serializers.orjson = None
+            elapsed, size = best_of(new_path, tasks, repeat)
+            print(f"{count:>7} {'serializer/stdlib':<18} {elapsed * 1000:>9.2f} {size:>10} {baseline / elapsed:>7.1f}x")
+
+            if fast_encoder is not None:
+                serializers.orjson = fast_encoder
+                elapsed, size = best_of(new_path, tasks, repeat)
+                print(f"{count:>7} {'serializer/orjson':<18} {elapsed * 1000:>9.2f} {size:>10} {baseline / elapsed:>7.1f}x")
+            serializers.orjson = fast_encoder
+
+
+if __name__ == "__main__":
+    main()
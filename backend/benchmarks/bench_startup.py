@@ -0,0 +1,121 @@
+"""Startup time and first-request latency.
+
+Two measurements, each repeated --repeat times (medians are reported):
+
+* import: a fresh interpreter importing app.main, i.e. what every gunicorn
+  worker (or, with preload, the master) pays before it can serve.
+* boot: gunicorn with --workers workers, with and without preload_app, from
+  spawning the master to the first 200 from /healthz, then the latency of
+  the first /readyz and the first authenticated GET /tasks, which open the
+  worker's MongoDB connections.
+
+Without BENCH_MONGO_URI the app points at a port where nothing listens, which
+shows that starting up no longer waits on the database; /readyz then answers
+503 and GET /tasks is skipped.
+
+Run from backend/:
+    python -m benchmarks.bench_startup [--repeat 5] [--workers 4]
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SECRET = "benchmark-secret-key-of-sufficient-length"
+USER_ID = "65f1c0ffee0000000000beef"
+UNREACHABLE_URI = "mongodb://127.0.0.1:9/planit_bench"
+
+
+def environment(port, preload=True):
+    # gunicorn.conf.py picks (and creates) the metrics directory itself.
+    env = {key: value for key, value in os.environ.items() if key != "PROMETHEUS_MULTIPROC_DIR"}
+    return dict(
+        env,
+        MONGO_URI=os.getenv("BENCH_MONGO_URI", UNREACHABLE_URI),
+        JWT_SECRET_KEY=SECRET,
+        SECRET_KEY=SECRET,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_PRELOAD="true" if preload else "false",
+        LOG_LEVEL="WARNING",
+        LOG_REQUESTS="false",
+    )
+
+
+def time_import(port):
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], env=environment(port), check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    return float(output.split()[-1])
+
+
+def get(port, path, token=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def time_boot(port, workers, preload, token):
+    start = time.perf_counter()
+    server = subprocess.Popen(["gunicorn", "app.main:app", "--workers", str(workers)],
+                              env=environment(port, preload),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                if get(port, "/healthz")[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() - start > 60:
+                raise RuntimeError("gunicorn did not come up")
+            time.sleep(0.01)
+        up = time.perf_counter() - start
+        ready_status, ready = get(port, "/readyz")
+        tasks = get(port, "/tasks", token)[1] if ready_status == 200 else None
+        return up, ready, ready_status, tasks
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def median_ms(values):
+    values = [value for value in values if value is not None]
+    return f"{statistics.median(values) * 1e3:9.1f}" if values else f"{'-':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    from app.aio import Tokens
+    token = Tokens({"JWT_SECRET_KEY": SECRET}).create_access_token(USER_ID)
+    print("MongoDB:", os.getenv("BENCH_MONGO_URI") or f"unreachable ({UNREACHABLE_URI})")
+
+    imports = [time_import(args.port) for _ in range(args.repeat)]
+    print(f"import app.main: {median_ms(imports).strip()} ms")
+
+    print(f"{'gunicorn':<22} {'up ms':>9} {'readyz ms':>9} {'status':>6} {'tasks ms':>9}")
+    for preload in (True, False):
+        runs = [time_boot(args.port, args.workers, preload, token) for _ in range(args.repeat)]
+        label = f"{args.workers} workers, " + ("preload" if preload else "no preload")
+        print(f"{label:<22} {median_ms([r[0] for r in runs])} {median_ms([r[1] for r in runs])} "
+              f"{runs[-1][2]:>6} {median_ms([r[3] for r in runs])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""GET /tasks/stats against the dashboard's current approach of downloading
+every page of GET /tasks and counting in the client.
+
+For each task count a fresh user is seeded, then both paths are timed and
+their response bytes summed. "cold" invalidates the user's cache entries
+before every request, so it measures the aggregation (or the full list
+fetch) itself; "warm" is a repeat request served from the task cache.
+
+Run from backend/:
+    python -m benchmarks.bench_stats [--sizes 100,1000,10000] [--repeat 5]
+
+With BENCH_MONGO_URI set the default sizes go up to 100000 tasks.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import auth_headers, create_bench_app
+
+
+def seed(app, user_id, count):
+    from app import mongo
+    now = datetime.utcnow().replace(microsecond=0)
+    today = datetime.combine(now.date(), datetime.min.time())
+    batch = []
+    with app.app_context():
+        for i in range(count):
+            batch.append({
+                "title": f"Task {i}",
+                "description": "Lorem ipsum dolor sit amet " * 3,
+                "due_date": today + timedelta(days=random.randint(-30, 30)),
+                "status": random.choice(["Pending", "In Progress", "Completed"]),
+                "priority": random.choice(["Low", "Medium", "High"]),
+                "user_id": user_id,
+                "reminder": None,
+                "shared_with": [],
+                "created_at": now,
+                "updated_at": now,
+                "version": 1,
+            })
+            if len(batch) == 10000:
+                mongo.db.tasks.insert_many(batch)
+                batch = []
+        if batch:
+            mongo.db.tasks.insert_many(batch)
+
+
+def full_list(client, headers, limit):
+    """Every page of GET /tasks, the way the dashboard loads its counts."""
+    body_bytes, requests, cursor = 0, 0, None
+    while True:
+        url = f"/tasks?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=headers)
+        body_bytes += len(response.get_data())
+        requests += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return body_bytes, requests
+
+
+def stats(client, headers, limit):
+    response = client.get("/tasks/stats", headers=headers)
+    return len(response.get_data()), 1
+
+
+def timed(fn, client, headers, limit, repeat, cold, user_id):
+    from app import task_cache
+    timings, result = [], None
+    fn(client, headers, limit)  # fill the cache for the warm runs
+    for _ in range(repeat):
+        if cold:
+            task_cache.invalidate(user_id)
+        start = time.perf_counter()
+        result = fn(client, headers, limit)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    default_sizes = "100,1000,10000,100000" if os.getenv("BENCH_MONGO_URI") else "100,1000,10000"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=default_sizes)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app, client = create_bench_app()
+    limit = app.config["TASKS_MAX_PAGE_SIZE"]
+    print(f"{'tasks':>7} {'path':<16} {'requests':>8} {'bytes':>12} {'cold ms':>10} {'warm ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        user_id = f"bench-stats-{size}"
+        seed(app, user_id, size)
+        headers = auth_headers(app, user_id)
+        for label, fn in (("full list", full_list), ("/tasks/stats", stats)):
+            cold, (body_bytes, requests) = timed(fn, client, headers, limit, args.repeat, True, user_id)
+            warm, _ = timed(fn, client, headers, limit, args.repeat, False, user_id)
+            print(f"{size:>7} {label:<16} {requests:>8} {body_bytes:>12,} "
+                  f"{cold * 1e3:>10.2f} {warm * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""Regression benchmark for every route in app/routes/auth.py and tasks.py.
+
+The app from create_app() runs in-process against mongomock, or against a
+real mongod: BENCH_MONGO_URI if set, else one launched on a temporary
+directory when a mongod binary is on PATH (--mongo picks explicitly).
+--users users are seeded with --tasks tasks each. Every route is then
+driven by --concurrency threads (each level in turn), each with its own
+test client, for --requests requests (--auth-requests for /signup and
+/login, which spend most of their time hashing passwords), and reports:
+
+* throughput (requests/s) and p50/p95/p99 latency;
+* errors: responses outside 2xx, or that failed while streaming;
+* shed: 503s from /signup and /login turning work away past
+  PASSWORD_HASH_MAX_PENDING, which is load shedding, not an error;
+* per-request allocations: the median tracemalloc peak of a request, over
+  --alloc-requests sequential requests run separately from the timing.
+
+Results go to benchmarks/results/<commit>.json (or --output), together with
+the commit, Python version, MongoDB backend and parameters, so that two
+runs can be compared with benchmarks.compare_results.
+
+Run from backend/:
+    python -m benchmarks.bench_suite [--concurrency 1,4,16] [--requests 100]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PASSWORD = "benchmark-password"
+
+
+# -- MongoDB --------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch_mongod():
+    """Start a throwaway mongod; returns (process, uri, data directory)."""
+    from pymongo import MongoClient
+    dbpath = tempfile.mkdtemp(prefix="planit-bench-")
+    port = free_port()
+    process = subprocess.Popen(
+        [shutil.which("mongod"), "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}/planit_bench"
+    MongoClient(uri, serverSelectionTimeoutMS=30000).admin.command("ping")
+    return process, uri, dbpath
+
+
+def select_mongo(choice):
+    """Point benchmarks.common at the chosen backend. Must run before it is
+    imported. Returns (label, cleanup)."""
+    if choice == "auto":
+        choice = "uri" if os.getenv("BENCH_MONGO_URI") else ("mongod" if shutil.which("mongod") else "mongomock")
+    if choice == "mongomock":
+        os.environ.pop("BENCH_MONGO_URI", None)
+        return "mongomock", lambda: None
+    if choice == "uri":
+        if not os.getenv("BENCH_MONGO_URI"):
+            sys.exit("--mongo uri needs BENCH_MONGO_URI")
+        return "mongod (BENCH_MONGO_URI)", lambda: None
+    if not shutil.which("mongod"):
+        sys.exit("--mongo mongod needs a mongod binary on PATH")
+    process, uri, dbpath = launch_mongod()
+    os.environ["BENCH_MONGO_URI"] = uri
+
+    def cleanup():
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+    return "mongod (launched)", cleanup
+
+
+# -- Seeding --------------------------------------------------------------
+
+def task_documents(user_id, count, **fields):
+    now = datetime.utcnow().replace(microsecond=0)
+    today = datetime.combine(now.date(), datetime.min.time())
+    return [dict({
+        "title": f"Task {i}",
+        "description": "Lorem ipsum dolor sit amet " * 3,
+        "due_date": today + timedelta(days=i % 60 - 30),
+        "status": ["Pending", "In Progress", "Completed"][i % 3],
+        "priority": ["Low", "Medium", "High"][i % 3],
+        "user_id": user_id,
+        "reminder": None,
+        "shared_with": [],
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }, **fields) for i in range(count)]
+
+
+def insert_tasks(app, documents):
+    from app import mongo
+    ids = []
+    with app.app_context():
+        for offset in range(0, len(documents), 10000):
+            ids.extend(mongo.db.tasks.insert_many(documents[offset:offset + 10000]).inserted_ids)
+    return [str(task_id) for task_id in ids]
+
+
+class Context:
+    """Seeded users and their tasks, shared by the scenarios."""
+
+    def __init__(self, app, users, tasks):
+        from app.models import User
+        from benchmarks.common import auth_headers
+        self.app = app
+        self.users = []
+        with app.app_context():
+            for n in range(users):
+                username = f"bench-user-{n}"
+                user_id = str(User.create_user(username, f"{username}@example.com", PASSWORD).inserted_id)
+                # A few tasks of every user are shared with the next one, so
+                # /tasks/shared has something to list.
+                neighbour = f"bench-user-{(n + 1) % users}"
+                documents = task_documents(user_id, tasks)
+                for document in documents[:tasks // 10]:
+                    document["shared_with"] = [neighbour]
+                self.users.append({
+                    "id": user_id, "username": username, "headers": auth_headers(app, user_id),
+                    "tasks": insert_tasks(app, documents),
+                })
+        self.import_body = b"".join(
+            json.dumps({"title": f"Imported {i}", "due_date": "2030-01-01", "priority": "Low"}).encode() + b"\n"
+            for i in range(100)
+        )
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def task(self, i):
+        user = self.user(i)
+        return user, user["tasks"][(i // len(self.users)) % len(user["tasks"])]
+
+    def fresh_tasks(self, count, **fields):
+        """`count` new tasks of the first user, for routes that use them up."""
+        user = self.users[0]
+        return insert_tasks(self.app, task_documents(user["id"], count, **fields))
+
+
+# -- Scenarios ------------------------------------------------------------
+# One per endpoint. build(ctx, prepared, i) returns (method, url, kwargs) for
+# the i-th request; prepare(ctx, count), if given, creates what `count`
+# requests will consume and its result is passed to build as `prepared`.
+
+def _on_task(method, suffix, body=None):
+    def build(ctx, prepared, i):
+        user, task_id = ctx.task(i)
+        kwargs = {"headers": user["headers"]}
+        if body is not None:
+            kwargs["json"] = body(i)
+        return method, f"/tasks/{task_id}{suffix}", kwargs
+    return build
+
+
+def _get(url):
+    def build(ctx, prepared, i):
+        return "GET", url, {"headers": ctx.user(i)["headers"]}
+    return build
+
+
+def _signup(ctx, prepared, i):
+    username = f"bench-signup-{prepared}-{i}"
+    return "POST", "/signup", {"json": {"username": username, "email": f"{username}@example.com",
+                                        "password": PASSWORD}}
+
+
+def _login(ctx, prepared, i):
+    return "POST", "/login", {"json": {"username": ctx.user(i)["username"], "password": PASSWORD}}
+
+
+def _create(ctx, prepared, i):
+    return "POST", "/tasks", {"headers": ctx.user(i)["headers"],
+                              "json": {"title": f"New {i}", "due_date": "2030-01-01", "priority": "High"}}
+
+
+def _bulk(ctx, prepared, i):
+    user = ctx.user(i)
+    count = len(user["tasks"])
+    ids = {user["tasks"][(i * 20 + k) % count] for k in range(20)}
+    return "POST", "/tasks/bulk", {"headers": user["headers"],
+                                   "json": {"operations": [{"op": "complete", "id": t} for t in ids]}}
+
+
+def _share(ctx, prepared, i):
+    user = ctx.users[0]
+    return "POST", "/tasks/share", {"headers": user["headers"],
+                                    "json": {"task_ids": [prepared[i]], "user_ids": [f"viewer-{i}"]}}
+
+
+def _unshare(ctx, prepared, i):
+    user = ctx.users[0]
+    return "POST", "/tasks/unshare", {"headers": user["headers"],
+                                      "json": {"task_ids": [prepared[i]], "user_ids": ["viewer"]}}
+
+
+def _delete(ctx, prepared, i):
+    return "DELETE", f"/tasks/{prepared[i]}", {"headers": ctx.users[0]["headers"]}
+
+
+def _import(ctx, prepared, i):
+    return "POST", "/tasks/import", {"headers": dict(ctx.user(i)["headers"], **{"Content-Type": "application/x-ndjson"}),
+                                     "data": ctx.import_body}
+
+
+SCENARIOS = {
+    "auth.signup": (_signup, lambda ctx, count: uuid.uuid4().hex[:8]),
+    "auth.login": (_login, None),
+    "tasks.create_task": (_create, None),
+    "tasks.get_tasks": (_get("/tasks"), None),
+    "tasks.get_shared_tasks": (_get("/tasks/shared"), None),
+    "tasks.share_tasks": (_share, lambda ctx, count: ctx.fresh_tasks(count)),
+    "tasks.unshare_tasks": (_unshare, lambda ctx, count: ctx.fresh_tasks(count, shared_with=["viewer"])),
+    "tasks.get_task_stats": (_get("/tasks/stats"), None),
+    "tasks.export_tasks": (_get("/tasks/export"), None),
+    "tasks.import_tasks": (_import, None),
+    "tasks.get_task_changes": (_get("/tasks/changes"), None),
+    "tasks.bulk_tasks": (_bulk, None),
+    "tasks.update_task": (_on_task("PUT", "", lambda i: {"title": f"Renamed {i}"}), None),
+    "tasks.delete_task": (_delete, lambda ctx, count: ctx.fresh_tasks(count)),
+    "tasks.complete_task": (_on_task("PUT", "/complete"), None),
+    "tasks.set_reminder": (_on_task("PUT", "/set_reminder", lambda i: {"reminder": "2030-01-01 09:00"}), None),
+    "tasks.share_task": (_on_task("PUT", "/share", lambda i: {"shared_user_id": f"viewer-{i % 10}"}), None),
+}
+
+
+def check_coverage(app):
+    """Every auth and tasks endpoint needs a scenario, and vice versa."""
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.split(".")[0] in ("auth", "tasks")}
+    missing, stale = endpoints - set(SCENARIOS), set(SCENARIOS) - endpoints
+    if missing or stale:
+        sys.exit(f"bench_suite is out of date: no scenario for {sorted(missing)}, "
+                 f"no route for {sorted(stale)}")
+
+
+# -- Measurement ----------------------------------------------------------
+
+def send(client, request):
+    method, url, kwargs = request
+    response = client.open(url, method=method, **kwargs)
+    response.get_data()
+    return response.status_code
+
+
+def drive(app, requests, concurrency):
+    """Send all requests from `concurrency` threads; returns (latencies,
+    errors, shed, wall time)."""
+    latencies, counts = [], {"errors": 0, "shed": 0}
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        while True:
+            i = next(counter)
+            if i >= len(requests):
+                return
+            start = time.perf_counter()
+            try:
+                status = send(client, requests[i])
+            except Exception:  # raised while streaming, after the status line
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status == 503:
+                    counts["shed"] += 1
+                elif status is None or not 200 <= status < 300:
+                    counts["errors"] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, counts["errors"], counts["shed"], time.perf_counter() - start
+
+
+def allocation_peaks(app, requests):
+    client = app.test_client()
+    send(client, requests[0])  # first-call imports and caches aren't per-request
+    peaks = []
+    for request in requests[1:]:
+        tracemalloc.start()
+        send(client, request)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peaks
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def build_requests(ctx, endpoint, count):
+    build, prepare = SCENARIOS[endpoint]
+    prepared = prepare(ctx, count) if prepare else None
+    return [build(ctx, prepared, i) for i in range(count)]
+
+
+def run_endpoint(app, ctx, endpoint, concurrency_levels, count, alloc_count):
+    rule = next(rule for rule in app.url_map.iter_rules() if rule.endpoint == endpoint)
+    method = sorted(rule.methods - {"HEAD", "OPTIONS"})[0]
+    peaks = sorted(allocation_peaks(app, build_requests(ctx, endpoint, alloc_count + 1)))
+    results = []
+    for concurrency in concurrency_levels:
+        latencies, errors, shed, wall = drive(app, build_requests(ctx, endpoint, count), concurrency)
+        latencies.sort()
+        results.append({
+            "endpoint": endpoint, "method": method, "rule": rule.rule,
+            "concurrency": concurrency, "requests": count, "errors": errors, "shed": shed,
+            "throughput": count / wall,
+            "p50_ms": percentile(latencies, 0.50) * 1e3,
+            "p95_ms": percentile(latencies, 0.95) * 1e3,
+            "p99_ms": percentile(latencies, 0.99) * 1e3,
+            "alloc_peak_kib": statistics.median(peaks) / 1024,
+        })
+    return results
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode().strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], check=True,
+                                    stdout=subprocess.PIPE).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo", choices=("auto", "mongomock", "mongod", "uri"), default="auto")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=500, help="tasks seeded per user")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--auth-requests", type=int, default=20)
+    parser.add_argument("--alloc-requests", type=int, default=20)
+    parser.add_argument("--cache", choices=("local", "none"), default="local")
+    parser.add_argument("--only", help="comma-separated endpoints, e.g. tasks.get_tasks,auth.login")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    os.environ["TASK_CACHE_BACKEND"] = args.cache
+    mongo_label, cleanup = select_mongo(args.mongo)
+    try:
+        from benchmarks.common import create_bench_app
+        app, _ = create_bench_app()
+        check_coverage(app)
+        ctx = Context(app, args.users, args.tasks)
+
+        levels = [int(level) for level in args.concurrency.split(",")]
+        endpoints = args.only.split(",") if args.only else list(SCENARIOS)
+        results = []
+        print(f"{'endpoint':<24} {'conc':>4} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'errors':>6} {'shed':>5} {'alloc KiB':>10}")
+        for endpoint in endpoints:
+            count = args.auth_requests if endpoint.startswith("auth.") else args.requests
+            for row in run_endpoint(app, ctx, endpoint, levels, count, args.alloc_requests):
+                results.append(row)
+                print(f"{endpoint:<24} {row['concurrency']:>4} {row['throughput']:>9.1f} {row['p50_ms']:>8.2f} "
+                      f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>6} {row['shed']:>5} "
+                      f"{row['alloc_peak_kib']:>10.1f}")
+    finally:
+        cleanup()
+
+    commit, dirty = git_revision()
+    report = {
+        "commit": commit, "dirty": dirty,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(), "mongo": mongo_label,
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
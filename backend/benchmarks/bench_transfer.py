@@ -0,0 +1,116 @@
+"""Rows/sec and memory of POST /tasks/import and GET /tasks/export.
+
+A task file of --tasks rows is generated on disk and imported through the
+app, then exported back as NDJSON and CSV, with the response consumed chunk
+by chunk like a download. Each step runs twice: once for throughput, and
+once under tracemalloc for the working memory it needed, i.e. the peak of
+traced allocations above what is still held afterwards (with mongomock the
+"database" itself lives in the process, and that part is not the request's
+doing). mongomock also copies every matching document when a cursor
+opens, so only against a real mongod is the export's memory flat. The export
+is also compared with materializing the whole list and encoding it in one
+go, the way GET /tasks used to answer.
+
+Run from backend/:
+    python -m benchmarks.bench_transfer [--tasks 100000] [--format ndjson]
+
+With BENCH_MONGO_URI set the default is the full 1,000,000 tasks.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import auth_headers, create_bench_app
+
+
+def write_file(path, fmt, count):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(["title", "description", "due_date", "status", "priority"])
+        for i in range(count):
+            row = [f"Task {i}", "Lorem ipsum dolor sit amet " * 3, f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                   "Pending", ["Low", "Medium", "High"][i % 3]]
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(("title", "description", "due_date", "status", "priority"), row))))
+                f.write("\n")
+
+
+def run_import(client, headers, path, fmt):
+    with open(path, "rb") as f:
+        response = client.post(f"/tasks/import?format={fmt}", data=f, headers=headers)
+    return response.get_json()["imported"]
+
+
+def run_export(client, headers, fmt):
+    response = client.get(f"/tasks/export?format={fmt}", headers=headers, buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def run_materialized(app, user_id):
+    from app import mongo
+    from benchmarks.bench_serializer import old_path
+    with app.app_context():
+        return len(old_path(list(mongo.db.tasks.find({"user_id": user_id}))))
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def working_memory(fn, *args):
+    tracemalloc.start()
+    fn(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - current
+
+
+def report(label, rows, elapsed, memory, size=None):
+    size = f"{size / 2**20:10.1f}" if size is not None else f"{'':>10}"
+    print(f"{label:<24} {rows:>10,} {elapsed:>9.2f} {rows / elapsed:>11,.0f} {size} {memory / 2**20:>12.1f}")
+
+
+def main():
+    default_tasks = 1_000_000 if os.getenv("BENCH_MONGO_URI") else 100_000
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=default_tasks)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    args = parser.parse_args()
+
+    app, client = create_bench_app()
+    print(f"{'step':<24} {'rows':>10} {'seconds':>9} {'rows/s':>11} {'MB out':>10} {'working MB':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"tasks.{args.format}")
+        write_file(path, args.format, args.tasks)
+
+        headers = auth_headers(app, "bench-import")
+        imported, elapsed = measure(run_import, client, headers, path, args.format)
+        memory = working_memory(run_import, client, auth_headers(app, "bench-import-traced"), path, args.format)
+        report(f"import {args.format}", imported, elapsed, memory)
+
+    for fmt in ("ndjson", "csv"):
+        size, elapsed = measure(run_export, client, headers, fmt)
+        memory = working_memory(run_export, client, headers, fmt)
+        report(f"export {fmt} (streamed)", imported, elapsed, memory, size)
+
+    size, elapsed = measure(run_materialized, app, "bench-import")
+    memory = working_memory(run_materialized, app, "bench-import")
+    report("full list in memory", imported, elapsed, memory, size)
+
+
+if __name__ == "__main__":
+    main()
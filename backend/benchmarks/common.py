@@ -0,0 +1,40 @@
+"""Shared setup for the benchmark scripts.
+
+The app is booted in-process and driven through Flask's test client. Set
+BENCH_MONGO_URI to run against a real mongod; otherwise mongomock stands in
+for MongoDB (pip install mongomock), which measures the Python side only.
+"""
+import logging
+import os
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ["MONGO_URI"] = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017/planit_bench")
+
+if not os.getenv("BENCH_MONGO_URI"):
+    import flask_pymongo
+    import mongomock
+    flask_pymongo.MongoClient = mongomock.MongoClient
+
+
+def create_bench_app():
+    """Return (app, test_client) with a clean benchmark database."""
+    logging.disable(logging.INFO)
+
+    from app import create_app, mongo
+    from app.models import Task, User
+    app = create_app()
+    with app.app_context():
+        for name in mongo.db.list_collection_names():
+            if name != "system.indexes":
+                mongo.db[name].delete_many({})
+        Task.ensure_indexes()
+        User.ensure_indexes()
+    return app, app.test_client()
+
+
+def auth_headers(app, user_id):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        token = create_access_token(identity=user_id)
+    return {"Authorization": f"Bearer {token}"}
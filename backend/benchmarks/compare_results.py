@@ -0,0 +1,61 @@
+"""Compare two bench_suite result files, e.g. the parent commit and yours.
+
+For every endpoint and concurrency level in both files, prints throughput,
+p95 and allocation changes, and marks a regression when throughput falls or
+p95 latency or allocations grow by more than --threshold percent, or when a
+route errors where it did not before. Exits 1 if there is any regression.
+
+Run from backend/:
+    python -m benchmarks.compare_results benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(row["endpoint"], row["concurrency"]): row for row in report["results"]}
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    old_report, old = load(args.old)
+    new_report, new = load(args.new)
+    for label, report in (("old", old_report), ("new", new_report)):
+        print(f"{label}: {report['commit']}{' (dirty)' if report['dirty'] else ''}, "
+              f"{report['mongo']}, Python {report['python']}, {report['timestamp']}")
+    if old_report["mongo"] != new_report["mongo"] or old_report["params"] != new_report["params"]:
+        print("warning: the runs used different backends or parameters")
+
+    regressions = 0
+    print(f"{'endpoint':<24} {'conc':>4} {'req/s':>8} {'p95':>8} {'alloc':>8} {'errors':>9}")
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        throughput = change(a["throughput"], b["throughput"])
+        p95 = change(a["p95_ms"], b["p95_ms"])
+        alloc = change(a["alloc_peak_kib"], b["alloc_peak_kib"])
+        worse = (throughput < -args.threshold or p95 > args.threshold or alloc > args.threshold
+                 or b["errors"] > a["errors"])
+        regressions += worse
+        print(f"{key[0]:<24} {key[1]:>4} {throughput:>+7.1f}% {p95:>+7.1f}% {alloc:>+7.1f}% "
+              f"{a['errors']:>4}->{b['errors']:<4}{'  REGRESSION' if worse else ''}")
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"{key[0]:<24} {key[1]:>4} only in {'old' if key in old else 'new'}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
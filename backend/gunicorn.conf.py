@@ -0,0 +1,43 @@
+# Loaded automatically by gunicorn from the working directory (see Dockerfile).
+import os
+import shutil
+
+# prometheus_client reads this when it is first imported, so it has to be
+# set here, before any worker loads the app.
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/planit-metrics")
+# With preload_app the master imports the app before on_starting runs.
+os.makedirs(metrics_dir, exist_ok=True)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Threaded workers: a request waiting on MongoDB or on the password hashing
+# pool holds one thread, not the whole worker. Keep PASSWORD_HASH_MAX_PENDING
+# below the thread count, so a login storm is turned away with 503s while
+# the remaining threads keep serving everything else.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Import the app once in the master and fork workers from it, instead of
+# every worker importing it again: workers come up in milliseconds and share
+# the loaded code. post_fork gives each one its own client and log thread.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def on_starting(server):
+    # Each worker would keep its own copy and miss the others' invalidations.
+    if server.cfg.workers > 1 and os.getenv("TASK_CACHE_BACKEND") == "local":
+        raise RuntimeError("TASK_CACHE_BACKEND=local needs a single worker; use redis or none")
+    # Drop samples left behind by a previous master.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import init_after_fork
+        init_after_fork(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,48 @@
+import os
+from datetime import datetime
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/planit_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-of-sufficient-length")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    import flask_pymongo
+    monkeypatch.setattr(flask_pymongo, "MongoClient", mongomock.MongoClient)
+    from app import create_app
+    return create_app()
+
+
+def test_create_indexes_builds_tombstone_indexes(app):
+    from app import mongo
+
+    result = app.test_cli_runner().invoke(args=["create-indexes"])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        indexes = mongo.db.task_tombstones.index_information()
+    assert indexes["user_deleted_at"]["key"] == [("user_id", 1), ("deleted_at", 1), ("_id", 1)]
+    assert indexes["deleted_at_ttl"]["expireAfterSeconds"] == app.config["TOMBSTONE_TTL_SECONDS"]
+
+
+def test_create_indexes_schedules_legacy_reminders(app):
+    from app import mongo
+
+    with app.app_context():
+        reminders = ("2030-01-01T09:30", "2030-01-01 09:30", "", "not a date")
+        ids = [mongo.db.tasks.insert_one({"user_id": "u1", "reminder": reminder}).inserted_id
+               for reminder in reminders]
+
+    result = app.test_cli_runner().invoke(args=["create-indexes"])
+    assert "Scheduled 2 legacy reminder(s); 1 could not be parsed." in result.output
+
+    with app.app_context():
+        tasks = [mongo.db.tasks.find_one({"_id": task_id}) for task_id in ids]
+    assert [task["reminder_pending"] for task in tasks] == [True, True, False, False]
+    assert tasks[0]["reminder"] == tasks[1]["reminder"] == datetime(2030, 1, 1, 9, 30)
+    assert tasks[3]["reminder"] == "not a date"
@@ -41,22 +41,32 @@ export const createTask = async (formData, token) => {
     return response.json();
 };
 
+// GET /tasks returns one page at a time; X-Next-Cursor points at the next
+// one until the list is exhausted. This follows it and returns every task.
 export const getTasks = async (token) => {
-    const response = await fetch(`${API_URL}/tasks`, {
-        method: 'GET',
-        headers: {
-            'Authorization': `Bearer ${token}`,
-        },
-    });
+    const tasks = [];
+    let cursor = null;
+    do {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${API_URL}/tasks${query}`, {
+            method: 'GET',
+            headers: {
+                'Authorization': `Bearer ${token}`,
+            },
+        });
 
-    // Handle response errors
-    if (!response.ok) {
-        const errorData = await response.json();
-        console.error('Error fetching tasks:', errorData);
-        throw new Error(errorData.error || 'Error fetching tasks');
-    }
+        // Handle response errors
+        if (!response.ok) {
+            const errorData = await response.json();
+            console.error('Error fetching tasks:', errorData);
+            throw new Error(errorData.error || 'Error fetching tasks');
+        }
 
-    return response.json();
+        tasks.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    return tasks;
 };
 
 export const updateTask = async (taskId, formData, token) => {
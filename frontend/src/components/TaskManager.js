@@ -3,6 +3,7 @@ import { AuthContext } from '../context/AuthContext';
 import TaskList from './TaskList';
 import TaskForm from './TaskForm';
 import EditTaskModal from './EditTaskModal';
+import { getTasks } from '../api';
 
 export default function TaskManager() {
   const { token } = useContext(AuthContext);
@@ -13,12 +14,7 @@ export default function TaskManager() {
 
   const fetchTasks = async () => {
     try {
-      const res = await fetch(API_URL, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-
-      if (!res.ok) throw new Error(`HTTP error: ${res.status}`);
-      const data = await res.json();
+      const data = await getTasks(token);
       console.log("Fetched tasks:", data);
       data.forEach((task, index) => {
         console.log(`Task ${index} _id:`, task._id, "Type:", typeof task._id);
@@ -4,6 +4,7 @@ import { Plus, BarChart3, Clock, CheckCircle, AlertTriangle, Sparkles, Eye, Tren
 import TaskForm from '../components/TaskForm';
 import EditTaskModal from '../components/EditTaskModal';
 import TaskList from '../components/TaskList';
+import { getTasks } from '../api';
 
 const Dashboard = () => {
   const { token } = useContext(AuthContext);
@@ -16,17 +17,13 @@ const Dashboard = () => {
 
   const fetchTasks = useCallback(async () => {
     try {
-      const res = await fetch(API_URL, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      if (!res.ok) throw new Error(`HTTP error: ${res.status}`);
-      const data = await res.json();
+      const data = await getTasks(token);
       setTasks(data);
       calculateStats(data);
     } catch (err) {
       console.error("Fetch error:", err);
     }
-  }, [API_URL, token]); // dependencies
+  }, [token]); // dependencies
 
   useEffect(() => {
     if (token) fetchTasks();